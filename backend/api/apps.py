@@ -1,5 +1,25 @@
 from django.apps import AppConfig
+from django.conf import settings
+
+
+def warm_up():
+    """
+    Build the MediaPipe Hands graphs and compile the recognizer kernels now
+    rather than on the first frame. Call it in the serving process itself,
+    e.g. from gunicorn's post_fork hook when using --preload.
+    """
+    from .hand_tracking import warm_up as warm_up_hands
+    warm_up_hands()
+    # Compile the recognizer kernels (no-op without numba)
+    from . import recognizer_njit
+    recognizer_njit.warm_up()
+
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "api"
\ No newline at end of file
+    name = "api"
+
+    def ready(self):
+        # Opt-in (settings.SIGNWAVE_WARMUP_MODELS): ready() also runs for migrate etc.
+        if getattr(settings, "SIGNWAVE_WARMUP_MODELS", False):
+            warm_up()
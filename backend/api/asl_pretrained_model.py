@@ -1,9 +1,29 @@
+import logging
 import os
-import json
 import numpy as np
+import orjson
 import tensorflow as tf
 from tensorflow import keras
 
+from .batching import BatchedInferenceQueue
+
+__all__ = ['ASLPretrainedModel']
+
+logger = logging.getLogger(__name__)
+
+# Features per frame coming from the hand tracker: 21 landmarks * (x,y,z)
+HAND_FEATURE_DIM = 63
+
+# Same switch as islr_loader: XLA-compile the forward pass unless debugging
+SIGNWAVE_DEBUG = os.environ.get("SIGNWAVE_DEBUG", "") == "1"
+
+# Compile every padded batch size at load time only when the deployment asks
+# for warm-up (see settings.SIGNWAVE_WARMUP_MODELS); otherwise on first use
+SIGNWAVE_WARMUP_MODELS = os.environ.get("SIGNWAVE_WARMUP_MODELS", "0") == "1"
+
+# Seconds predict() waits for its batch before giving up
+PREDICT_TIMEOUT = 10
+
 
 class ASLPretrainedModel:
     """
@@ -27,30 +47,40 @@ class ASLPretrainedModel:
         # Will be overwritten after load_model() based on model.input_shape.
         self.sequence_length = 30
         self.feature_dim = 63  # 21 landmarks * (x,y,z)
+        self._min_frames_default = min(30, self.sequence_length)
+        self._copy_frames = self._make_frame_copier()
 
         self.actions = []
-        self.idx_to_sign = {}
+        # labels[i] is the sign for class index i (None for unmapped indices)
+        self.labels = np.empty(0, dtype=object)
         self.sign_to_idx = {}
         self.num_actions = 0
 
         self.model = None
+        self._infer = None
+        self._jit_compile = not SIGNWAVE_DEBUG
+        self._batcher = None
         self.load_model()
 
     def load_model(self):
-        """Load the pre-trained Transformer model + label map from disk."""
+        """Load the label map + pre-trained Transformer model from disk."""
+        # Independent of the model, so the status views still list the signs
+        # when the weights are missing or fail to load
+        self._load_label_map()
+
         try:
             if not os.path.exists(self.model_path):
-                print(f"❌ Model file not found at {self.model_path}")
-                print("   Make sure you downloaded the .h5 from the GitHub repo.")
+                logger.error("Model file not found at %s; make sure you downloaded the .h5 from the GitHub repo", self.model_path)
                 return
 
             # If this model uses only built-in Keras layers, this is enough.
             # If you get an 'Unknown layer' error, you'll need to add the
             # corresponding custom_objects here (e.g., from backbone.py).
             self.model = keras.models.load_model(self.model_path, compile=False)
-            print(f"✅ Model loaded successfully from {self.model_path}")
-            print(f"   Model input shape: {self.model.input_shape}")
-            print(f"   Model output shape: {self.model.output_shape}")
+            logger.info(
+                "Model loaded from %s (input shape %s, output shape %s)",
+                self.model_path, self.model.input_shape, self.model.output_shape,
+            )
 
             # Infer sequence length & feature dim from the model
             # Expecting something like (None, T, D)
@@ -58,25 +88,91 @@ class ASLPretrainedModel:
                 _, T, D = self.model.input_shape
                 self.sequence_length = int(T)
                 self.feature_dim = int(D)
+                # Require at least some fraction of the target sequence
+                self._min_frames_default = min(30, self.sequence_length)
             else:
-                print("⚠️ Unexpected input shape; keeping default sequence_length=30, feature_dim=63")
+                logger.warning("Unexpected input shape; keeping default sequence_length=30, feature_dim=63")
 
-            # Load label mapping
-            self._load_label_map()
+            self._copy_frames = self._make_frame_copier()
+            self._build_inference()
 
-        except Exception as e:
-            print(f"❌ Error loading model: {e}")
+        except Exception:
+            logger.exception("Error loading model")
             self.model = None
 
+    def _build_inference(self):
+        """
+        Put a traced forward pass (so predict() skips Keras' per-call
+        predict() setup) behind a dynamic batching queue, so concurrent
+        requests share one forward pass. Batches are padded to a few fixed
+        sizes; with SIGNWAVE_WARMUP_MODELS each is traced/XLA-compiled here
+        at load time, otherwise on the first batch of that size.
+        """
+        self._infer = self._trace()
+        self._batcher = BatchedInferenceQueue(
+            self._run_batch,
+            max_batch_size=16,
+            name="asl-pretrained-batcher",
+            batch_sizes=(1, 2, 4, 8, 16),
+        )
+        if SIGNWAVE_WARMUP_MODELS:
+            self._batcher.warm_up((self.sequence_length, self.feature_dim))
+
+    def _trace(self):
+        model = self.model
+        return tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec((None, self.sequence_length, self.feature_dim), tf.float32)],
+            jit_compile=self._jit_compile,
+        )
+
+    def _run_batch(self, batch):
+        """
+        One forward pass over a padded batch. If XLA can't compile the model,
+        drop to a plain traced graph for good instead of failing every batch.
+        Only the batcher's worker (or warm-up, before it starts) calls this.
+        """
+        try:
+            return self._infer(tf.constant(batch)).numpy()
+        except Exception:
+            if not self._jit_compile:
+                raise
+            logger.warning("XLA compile of the forward pass failed; falling back to jit_compile=False", exc_info=True)
+            self._jit_compile = False
+            self._infer = self._trace()
+            return self._infer(tf.constant(batch)).numpy()
+
+    def _make_frame_copier(self):
+        """
+        Specialize the (T, 63) -> (T, feature_dim) copy for this model's
+        feature_dim, which is fixed once the model is loaded.
+        """
+        D_target = self.feature_dim
+
+        if D_target == HAND_FEATURE_DIM:
+            def copy_same_D(dst, frames):
+                dst[:len(frames)] = frames
+            return copy_same_D
+
+        if D_target > HAND_FEATURE_DIM:
+            def copy_pad_D(dst, frames):
+                dst[:len(frames), :HAND_FEATURE_DIM] = frames
+                dst[:, HAND_FEATURE_DIM:] = 0.0
+            return copy_pad_D
+
+        def copy_trunc_D(dst, frames):
+            dst[:len(frames)] = frames[:, :D_target]
+        return copy_trunc_D
+
     def _load_label_map(self):
         """Load sign <-> index mapping from the JSON file."""
         if not os.path.exists(self.label_map_path):
-            print(f"⚠️ Label map not found at {self.label_map_path}")
+            logger.warning("Label map not found at %s", self.label_map_path)
             return
 
         try:
-            with open(self.label_map_path, 'r', encoding='utf-8') as f:
-                mapping = json.load(f)
+            with open(self.label_map_path, 'rb') as f:
+                mapping = orjson.loads(f.read())
 
             # Try to detect mapping direction.
             # Most Kaggle/competition repos use {sign: index}.
@@ -84,73 +180,86 @@ class ASLPretrainedModel:
             if isinstance(sample_key, str) and not sample_key.isdigit():
                 # sign -> index
                 self.sign_to_idx = {k: int(v) for k, v in mapping.items()}
-                self.idx_to_sign = {v: k for k, v in self.sign_to_idx.items()}
             else:
                 # index -> sign
-                self.idx_to_sign = {int(k): v for k, v in mapping.items()}
-                self.sign_to_idx = {v: k for k, v in self.idx_to_sign.items()}
+                self.sign_to_idx = {v: int(k) for k, v in mapping.items()}
+
+            # Index-addressable label array: predict() does labels[argmax]
+            self.labels = np.empty(max(self.sign_to_idx.values()) + 1, dtype=object)
+            for sign, idx in self.sign_to_idx.items():
+                self.labels[idx] = sign
 
-            self.actions = [self.idx_to_sign[i] for i in sorted(self.idx_to_sign.keys())]
+            self.actions = [sign for sign in self.labels.tolist() if sign is not None]
             self.num_actions = len(self.actions)
 
-            print(f"✅ Loaded {self.num_actions} signs from label map")
-        except Exception as e:
-            print(f"⚠️ Error loading label map: {e}")
+            logger.info("Loaded %d signs from label map", self.num_actions)
+        except Exception:
+            logger.exception("Error loading label map")
 
-    def _flatten_hand_landmarks(self, frame_landmarks):
+    def _sequence_to_array(self, landmark_sequence):
         """
-        Convert a list of 21 landmarks with keys x,y,z into a flat feature vector.
-        Your view is already giving you `landmark['x'],['y'],['z']` in [0,1] coords.
-        """
-        frame_features = []
-        for lm in frame_landmarks:
-            frame_features.extend([lm['x'], lm['y'], lm['z']])
-        return frame_features  # length 63
+        Convert a landmark sequence into a (T_raw, 63) float32 array.
 
-    def preprocess_sequence(self, landmark_sequence):
+        Accepts either a NumPy array shaped (T, 21, 3) / (T, 63), or the
+        view's list of frames where each frame is 21 dicts with keys x,y,z.
+        """
+        if isinstance(landmark_sequence, np.ndarray):
+            frames = landmark_sequence.astype(np.float32, copy=False)
+            return frames.reshape(len(frames), -1)
+
+        # Single pass over the dicts straight into a float32 buffer
+        T_raw = len(landmark_sequence)
+        D_raw = 3 * len(landmark_sequence[0])
+        flat = np.fromiter(
+            (c for frame in landmark_sequence for lm in frame for c in (lm['x'], lm['y'], lm['z'])),
+            dtype=np.float32,
+            count=T_raw * D_raw,
+        )
+        return flat.reshape(T_raw, D_raw)
+
+    def preprocess_sequence(self, landmark_sequence, out=None):
         """
         Convert a sequence of hand landmarks to (1, sequence_length, feature_dim)
         by:
           - flattening (21 * 3 = 63) per frame,
           - padding/truncating time dimension to model.sequence_length,
           - padding/truncating feature dimension to model.feature_dim.
+
+        If `out` is given, the result is written into it in place instead of
+        allocating a new array.
         """
-        if not landmark_sequence:
+        if out is None:
+            out = np.empty((1, self.sequence_length, self.feature_dim), dtype=np.float32)
+        dst = out[0]
+
+        if len(landmark_sequence) == 0:
             # No frames at all; just return zeros
-            features = np.zeros((self.sequence_length, self.feature_dim), dtype=np.float32)
-            return features[np.newaxis, ...]
+            dst[...] = 0.0
+            return out
 
         # 1) Build frame-wise features (T_raw, 63)
-        frames = [self._flatten_hand_landmarks(f) for f in landmark_sequence]
-        frames = np.array(frames, dtype=np.float32)
+        frames = self._sequence_to_array(landmark_sequence)
 
-        # 2) Pad/truncate time dimension to self.sequence_length
-        T_raw, D_raw = frames.shape
+        # 2) Keep the most recent T_target frames
         T_target = self.sequence_length
-        D_target = self.feature_dim
+        frames = frames[-T_target:]
+        T_keep = len(frames)
 
-        if T_raw >= T_target:
-            frames = frames[-T_target:]  # keep the most recent frames
-        else:
-            # Pad by repeating last frame
-            last = frames[-1]
-            pad_count = T_target - T_raw
-            pad_block = np.repeat(last[np.newaxis, :], pad_count, axis=0)
-            frames = np.concatenate([frames, pad_block], axis=0)
-
-        # 3) Pad/truncate feature dimension to D_target
-        if D_raw == D_target:
-            pass  # nothing to do
-        elif D_raw < D_target:
-            pad_width = D_target - D_raw
-            pad_block = np.zeros((T_target, pad_width), dtype=np.float32)
-            frames = np.concatenate([frames, pad_block], axis=1)
+        # 3) Copy into the (T_target, D_target) buffer, truncating or
+        #    zero-padding the feature dimension
+        if frames.shape[1] == HAND_FEATURE_DIM:
+            self._copy_frames(dst, frames)
         else:
-            # Too many features; keep the first D_target (we only have 63 anyway)
-            frames = frames[:, :D_target]
+            D_keep = min(frames.shape[1], self.feature_dim)
+            dst[:T_keep, :D_keep] = frames[:, :D_keep]
+            dst[:, D_keep:] = 0.0
+
+        # 4) Pad time dimension by repeating the last frame
+        if T_keep < T_target:
+            dst[T_keep:] = dst[T_keep - 1]
 
         # Final shape: (1, sequence_length, feature_dim)
-        return frames[np.newaxis, :, :]
+        return out
 
     def predict(self, landmark_sequence, min_frames=None, threshold=0.6):
         """
@@ -159,29 +268,26 @@ class ASLPretrainedModel:
         Returns:
             (predicted_sign: str or None, confidence: float in [0,1])
         """
-        if self.model is None:
-            return None, 0.0
-
         if min_frames is None:
-            # Require at least some fraction of the target sequence
-            min_frames = min(30, self.sequence_length)
+            min_frames = self._min_frames_default
 
-        if len(landmark_sequence) < min_frames:
+        # Bail out before any feature buffers are allocated
+        if self.model is None or len(landmark_sequence) < min_frames:
             return None, 0.0
 
         try:
             features = self.preprocess_sequence(landmark_sequence)
-            predictions = self.model.predict(features, verbose=0)[0]  # shape: (num_classes,)
+            predictions = self._batcher.predict(features[0], timeout=PREDICT_TIMEOUT)  # shape: (num_classes,)
 
-            predicted_idx = int(np.argmax(predictions))
+            predicted_idx = np.argpartition(predictions, -1)[-1]
             confidence = float(predictions[predicted_idx])
 
-            sign = self.idx_to_sign.get(predicted_idx)
+            sign = self.labels[predicted_idx] if predicted_idx < len(self.labels) else None
             if sign is not None and confidence >= threshold:
                 return sign, confidence
 
             return None, confidence
 
-        except Exception as e:
-            print(f"Error during prediction: {e}")
+        except Exception:
+            logger.exception("Error during prediction")
             return None, 0.0
@@ -0,0 +1,138 @@
+"""
+Server-side dynamic batching for model inference.
+
+Concurrent requests enqueue single samples; one background thread merges
+whatever arrives within a short window into a batch and runs the model once.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+import numpy as np
+
+# How long the worker waits for companions after a batch's first sample.
+# 0 (the default) suits sync workers (gunicorn --threads 1), where a process
+# never has a second request to wait for; samples that queued up while the
+# previous batch ran are still batched together. With threaded workers a few
+# thousand microseconds lets simultaneous requests share one forward pass.
+BATCH_TIMEOUT_MICROS = int(os.environ.get("SIGNWAVE_BATCH_TIMEOUT_MICROS", "0"))
+
+
+class BatchedInferenceQueue:
+    """
+    Micro-batching scheduler in the style of TF-Serving's SharedBatchScheduler.
+
+    Args:
+        infer_fn: Callable mapping a (B, ...) float32 array to a (B, ...) array.
+        max_batch_size: Largest batch handed to infer_fn.
+        batch_timeout_micros: How long the worker waits for more samples
+            after the first one arrives; defaults to BATCH_TIMEOUT_MICROS.
+            Samples already queued are batched even at 0.
+        name: Name of the worker thread (shows up in thread dumps).
+        batch_sizes: Optional allowed batch sizes. A batch is padded up to
+            the smallest one that fits and the padding rows' outputs are
+            dropped, so a shape-specialized (XLA) infer_fn only ever sees
+            these shapes; warm_up() compiles each of them ahead of time.
+    """
+
+    def __init__(self, infer_fn, max_batch_size=16, batch_timeout_micros=None, name="batched-inference",
+                 batch_sizes=None):
+        self.infer_fn = infer_fn
+        self.max_batch_size = max_batch_size
+        if batch_timeout_micros is None:
+            batch_timeout_micros = BATCH_TIMEOUT_MICROS
+        self.batch_timeout = batch_timeout_micros / 1e6
+        self.name = name
+        self.batch_sizes = sorted(batch_sizes) if batch_sizes else None
+        if self.batch_sizes and self.batch_sizes[-1] < max_batch_size:
+            raise ValueError("batch_sizes must include a size >= max_batch_size")
+
+        self._queue = queue.Queue()
+        self._batch_buf = None  # (max_batch_size, ...) stacking buffer, owned by the worker
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, features):
+        """
+        Enqueue one sample (no batch dimension) and return a Future for its
+        row. The sample is copied, so the caller may reuse its buffer at once.
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((np.array(features, dtype=np.float32), future))
+        return future
+
+    def predict(self, features, timeout=None):
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(features).result(timeout=timeout)
+
+    def warm_up(self, sample_shape):
+        """Run infer_fn once per allowed batch size (or at max_batch_size) so no live request compiles."""
+        for size in self.batch_sizes or [self.max_batch_size]:
+            self.infer_fn(np.zeros((size,) + tuple(sample_shape), dtype=np.float32))
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_timeout
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Past the deadline, still take whatever is already queued
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _padded_size(self, n):
+        if self.batch_sizes is None:
+            return n
+        return next(size for size in self.batch_sizes if size >= n)
+
+    def _stack(self, samples):
+        """The samples stacked in rows [:n] of a (padded size, ...) view of the reused buffer."""
+        shape = samples[0].shape
+        size = self._padded_size(len(samples))
+        if self._batch_buf is None or self._batch_buf.shape[1:] != shape or len(self._batch_buf) < size:
+            self._batch_buf = np.zeros((max(size, self.max_batch_size),) + shape, dtype=np.float32)
+        np.stack(samples, out=self._batch_buf[:len(samples)])
+        # Padding rows hold whatever an earlier batch left there; their outputs are dropped
+        return self._batch_buf[:size]
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            futures = [future for _, future in batch]
+            try:
+                inputs = self._stack([features for features, _ in batch])
+                outputs = self.infer_fn(inputs)
+                if len(outputs) != len(inputs):
+                    raise ValueError(f"{self.name}: infer_fn returned {len(outputs)} rows for a batch of {len(inputs)}")
+            except Exception as e:
+                for future in futures:
+                    _settle(future, exception=e)
+                continue
+            for future, output in zip(futures, outputs):
+                _settle(future, result=output)
+
+
+def _settle(future, result=None, exception=None):
+    """Resolve `future` unless it already is (e.g. cancelled); never raises into the worker."""
+    if future.done():
+        return
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
@@ -0,0 +1,186 @@
+"""
+Fixed-size ring buffer of landmark frames for streaming recognition.
+"""
+import contextlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class FrameRingBuffer:
+    """
+    Keeps the most recent `capacity` frames in one preallocated array.
+
+    push() writes a single frame (O(frame size), no reallocation) and
+    window() returns the frames oldest-first, copying only when the ring
+    has wrapped around, and then into a scratch array allocated on the
+    first wrap and reused after that.
+
+    The buffer doesn't lock itself; callers that share one between request
+    threads hold `lock` across push() -> window() -> use -> clear().
+    """
+
+    __slots__ = ("capacity", "lock", "_frames", "_scratch", "_pos", "_count")
+
+    def __init__(self, capacity, frame_shape, dtype=np.float32):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self._frames = np.zeros((capacity,) + tuple(frame_shape), dtype=dtype)
+        self._scratch = None
+        self._pos = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def full(self):
+        return self._count == self.capacity
+
+    def push(self, frame):
+        """Overwrite the oldest slot with `frame`."""
+        self._frames[self._pos] = frame
+        self._pos = (self._pos + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def window(self):
+        """
+        Frames in chronological order, shape (len(self),) + frame_shape.
+        May be a view into the buffer or the scratch array, so use it before
+        the next push() or window().
+        """
+        if self._count < self.capacity:
+            return self._frames[:self._count]
+        if self._pos == 0:
+            return self._frames
+        if self._scratch is None:
+            self._scratch = np.empty_like(self._frames)
+        oldest = self.capacity - self._pos
+        self._scratch[:oldest] = self._frames[self._pos:]
+        self._scratch[oldest:] = self._frames[:self._pos]
+        return self._scratch
+
+    def clear(self):
+        self._pos = 0
+        self._count = 0
+
+
+class SessionBufferCache:
+    """
+    session_id -> FrameRingBuffer, created on first use.
+
+    Bounded so client-supplied session ids can't grow memory forever: the
+    least recently used buffer is dropped once `maxsize` sessions exist, and
+    buffers idle for longer than `ttl` seconds are dropped on the next access.
+    """
+
+    def __init__(self, capacity, frame_shape, maxsize=2048, ttl=600):
+        self.capacity = capacity
+        self.frame_shape = tuple(frame_shape)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._buffers = OrderedDict()  # session_id -> (buffer, last_used), oldest first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def __contains__(self, session_id):
+        return session_id in self._buffers
+
+    def get(self, session_id):
+        """The session's buffer, creating it (and evicting stale ones) if needed."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._buffers.pop(session_id, None)
+            if entry is None:
+                if len(self._buffers) >= self.maxsize:
+                    self._buffers.popitem(last=False)
+                buffer = FrameRingBuffer(self.capacity, self.frame_shape)
+            else:
+                buffer = entry[0]
+            self._buffers[session_id] = (buffer, now)
+            return buffer
+
+    def pop(self, session_id, default=None):
+        with self._lock:
+            entry = self._buffers.pop(session_id, None)
+        return entry[0] if entry is not None else default
+
+    def _expire(self, now):
+        while self._buffers:
+            _, (_, last_used) = next(iter(self._buffers.items()))
+            if now - last_used <= self.ttl:
+                break
+            self._buffers.popitem(last=False)
+
+
+class RedisFrameBuffer:
+    """
+    FrameRingBuffer interface over a Redis list of raw float32 frames, so
+    every worker process sees the same sequence for a session. push() is one
+    pipelined RPUSH + LTRIM + EXPIRE round trip.
+    """
+
+    def __init__(self, client, key, capacity, frame_shape, ttl):
+        self.capacity = capacity
+        self.frame_shape = tuple(frame_shape)
+        self._client = client
+        self._key = key
+        self._ttl = ttl
+        self._len = None  # known length after push()/clear(), else ask Redis
+        # window() returns a fresh array, and a process-local lock couldn't
+        # order other workers' pushes anyway
+        self.lock = contextlib.nullcontext()
+
+    def __len__(self):
+        if self._len is None:
+            self._len = min(self._client.llen(self._key), self.capacity)
+        return self._len
+
+    @property
+    def full(self):
+        return len(self) == self.capacity
+
+    def push(self, frame):
+        blob = np.ascontiguousarray(frame, dtype=np.float32).tobytes()
+        pipe = self._client.pipeline()
+        pipe.rpush(self._key, blob)
+        pipe.ltrim(self._key, -self.capacity, -1)
+        pipe.expire(self._key, self._ttl)
+        length, _, _ = pipe.execute()
+        self._len = min(length, self.capacity)
+
+    def window(self):
+        """Frames oldest-first, shape (len(self),) + frame_shape."""
+        blobs = self._client.lrange(self._key, 0, -1)
+        frames = np.frombuffer(b"".join(blobs), dtype=np.float32)
+        return frames.reshape((len(blobs),) + self.frame_shape)
+
+    def clear(self):
+        self._client.delete(self._key)
+        self._len = 0
+
+
+class RedisSessionBuffers:
+    """
+    SessionBufferCache interface backed by Redis: buffers outlive a single
+    worker process and expire `ttl` seconds after the session's last frame.
+    """
+
+    def __init__(self, client, capacity, frame_shape, ttl=600, prefix="signwave:seq:"):
+        self.capacity = capacity
+        self.frame_shape = tuple(frame_shape)
+        self.ttl = ttl
+        self._client = client
+        self._prefix = prefix
+
+    def get(self, session_id):
+        return RedisFrameBuffer(self._client, self._prefix + str(session_id), self.capacity, self.frame_shape, self.ttl)
+
+    def pop(self, session_id, default=None):
+        self._client.delete(self._prefix + str(session_id))
+        return default
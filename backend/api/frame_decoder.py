@@ -0,0 +1,202 @@
+"""
+Shared decoding of camera frames posted to the tracking endpoints.
+
+A frame can arrive four ways:
+  - raw JPEG/PNG bytes as the request body (Content-Type: image/* or
+    application/octet-stream), with other fields in the query string;
+  - raw RGB pixels as an application/octet-stream body with an
+    `X-Frame-Shape: HxW` header, which skips image decoding entirely;
+  - a multipart upload in the `image` (or `frame`) field;
+  - the original JSON/form `image` field holding a (data URL) base64 string.
+"""
+import base64
+import os
+import threading
+
+import cv2
+import numpy as np
+
+# libjpeg-turbo via PyTurboJPEG decodes JPEGs straight to RGB, faster than
+# cv2.imdecode; optional, OpenCV handles everything when it isn't installed
+try:
+    from turbojpeg import TJPF_RGB, TurboJPEG
+    TurboJPEG()  # raises if the libturbojpeg shared library itself is missing
+    TURBOJPEG_AVAILABLE = True
+except (ImportError, OSError, RuntimeError):
+    TURBOJPEG_AVAILABLE = False
+
+# Frames are decoded/resized on many request threads at once; OpenCV's own
+# pool per call would oversubscribe the cores MediaPipe is using
+cv2.setNumThreads(int(os.environ.get("SIGNWAVE_CV2_THREADS", "1")))
+
+BINARY_CONTENT_TYPES = ('image/', 'application/octet-stream')
+
+# OpenCV >= 4.10 can decode straight to RGB; older builds fall back to BGR + swap
+IMREAD_COLOR_RGB = getattr(cv2, 'IMREAD_COLOR_RGB', None)
+
+# Longest side fed to MediaPipe Hands; palm detection cost scales with pixels.
+# The palm detector itself runs at 192-256 px, so going lower mostly costs
+# landmark precision on small/far hands.
+HANDS_MAX_SIDE = int(os.environ.get("SIGNWAVE_HANDS_MAX_SIDE", "320"))
+# Holistic also crops the face/pose from the frame, so it keeps more detail
+HOLISTIC_MAX_SIDE = int(os.environ.get("SIGNWAVE_HOLISTIC_MAX_SIDE", "480"))
+
+# Largest encoded frame accepted (a 1080p JPEG is well under this); base64
+# text is 4/3 of the bytes it encodes
+MAX_FRAME_BYTES = 1_500_000
+MAX_FRAME_BASE64 = MAX_FRAME_BYTES * 4 // 3 + 4
+
+# Raw RGB frames (X-Frame-Shape) are capped at 720p; see DATA_UPLOAD_MAX_MEMORY_SIZE
+MAX_RAW_FRAME_PIXELS = 1280 * 720
+
+# Leading bytes of the formats browsers produce from a canvas/camera
+JPEG_SIGNATURE = b'\xff\xd8\xff'
+IMAGE_SIGNATURES = (JPEG_SIGNATURE, b'\x89PNG', b'RIFF')
+
+
+class FrameDecodeError(ValueError):
+    """The request did not contain a decodable image; the message is client-facing."""
+    status = 400
+
+
+class FrameTooLargeError(FrameDecodeError):
+    status = 413
+
+
+def _check_frame_bytes(data):
+    """Reject oversized or non-image payloads before OpenCV touches them."""
+    if len(data) > MAX_FRAME_BYTES:
+        raise FrameTooLargeError(f'Image larger than {MAX_FRAME_BYTES} bytes')
+    if not data.startswith(IMAGE_SIGNATURES):
+        raise FrameDecodeError('Unsupported image format (expected JPEG, PNG or WebP)')
+    return data
+
+
+def is_binary_frame_request(request):
+    return (request.content_type or '').startswith(BINARY_CONTENT_TYPES)
+
+
+def frame_request_params(request):
+    """
+    The request's non-image fields: the query string for raw-body uploads
+    (DRF has no parser for image/*), the parsed body otherwise.
+    """
+    if is_binary_frame_request(request):
+        return request.query_params
+    return request.data
+
+
+def request_flag(params, name):
+    """Boolean field that may arrive as JSON true/false or a '1'/'true' string."""
+    value = params.get(name, False)
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def read_frame_bytes(request):
+    """Encoded image bytes from whichever transport the client used."""
+    if is_binary_frame_request(request):
+        body = request.body
+        if not body:
+            raise FrameDecodeError('No image data provided')
+        return _check_frame_bytes(body)
+
+    upload = request.FILES.get('image') or request.FILES.get('frame')
+    if upload is not None:
+        if upload.size > MAX_FRAME_BYTES:
+            raise FrameTooLargeError(f'Image larger than {MAX_FRAME_BYTES} bytes')
+        return _check_frame_bytes(upload.read())
+
+    image_data = request.data.get('image')
+    if not image_data:
+        raise FrameDecodeError('No image data provided')
+    if not isinstance(image_data, str):
+        raise FrameDecodeError('Image must be a base64 string')
+
+    # Handle "data:image/png;base64,..." prefix if present
+    image_data = image_data.partition(',')[2] or image_data
+    if len(image_data) > MAX_FRAME_BASE64:
+        raise FrameTooLargeError(f'Image larger than {MAX_FRAME_BYTES} bytes')
+    try:
+        # validate=True rejects non-alphabet characters instead of skipping them
+        return _check_frame_bytes(base64.b64decode(image_data, validate=True))
+    except FrameDecodeError:
+        raise
+    except Exception as e:
+        raise FrameDecodeError(f'Invalid base64 data: {e}')
+
+
+def _raw_rgb_frame(request, shape):
+    """(H, W, 3) read-only view over a raw RGB body described by X-Frame-Shape."""
+    try:
+        h, w = (int(v) for v in shape.lower().split('x'))
+    except ValueError:
+        raise FrameDecodeError('X-Frame-Shape must look like 480x640 (HxW)')
+    if h <= 0 or w <= 0:
+        raise FrameDecodeError('X-Frame-Shape must be positive')
+    if h * w > MAX_RAW_FRAME_PIXELS:
+        raise FrameTooLargeError(f'Raw frames are limited to {MAX_RAW_FRAME_PIXELS} pixels')
+    body = request.body
+    if len(body) != h * w * 3:
+        raise FrameDecodeError(f'Expected {h * w * 3} bytes of RGB data for {h}x{w}, got {len(body)}')
+    # frombuffer over the immutable body is already read-only
+    return np.frombuffer(body, np.uint8).reshape(h, w, 3)
+
+
+_turbojpeg_local = threading.local()
+
+
+def _turbojpeg():
+    """This thread's TurboJPEG decoder, created on first use."""
+    decoder = getattr(_turbojpeg_local, 'decoder', None)
+    if decoder is None:
+        decoder = _turbojpeg_local.decoder = TurboJPEG()
+    return decoder
+
+
+def decode_frame(request):
+    """
+    Decode the posted frame into a read-only RGB image, the layout MediaPipe
+    and PIL both want. Read-only lets MediaPipe wrap it without copying.
+    """
+    shape = request.headers.get('X-Frame-Shape')
+    if shape and is_binary_frame_request(request):
+        return _raw_rgb_frame(request, shape)
+
+    data = read_frame_bytes(request)
+    if TURBOJPEG_AVAILABLE and data.startswith(JPEG_SIGNATURE):
+        try:
+            frame = _turbojpeg().decode(data, pixel_format=TJPF_RGB)
+        except OSError:
+            raise FrameDecodeError('Could not decode image')
+        frame.flags.writeable = False
+        return frame
+
+    nparr = np.frombuffer(data, np.uint8)
+    if IMREAD_COLOR_RGB is not None:
+        frame = cv2.imdecode(nparr, IMREAD_COLOR_RGB)
+    else:
+        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        if frame is not None:
+            # Swap channels in the decoded buffer instead of allocating another
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+    if frame is None:
+        raise FrameDecodeError('Could not decode image')
+    frame.flags.writeable = False
+    return frame
+
+
+def downscale_frame(frame, max_side=HANDS_MAX_SIDE):
+    """
+    Shrink `frame` so its longest side is at most `max_side`, keeping the
+    aspect ratio (so MediaPipe's normalized landmarks are unchanged).
+    Smaller frames are returned as-is, never upscaled.
+    """
+    h, w = frame.shape[:2]
+    longest = max(h, w)
+    if longest <= max_side:
+        return frame
+    scale = max_side / longest
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
@@ -0,0 +1,266 @@
+"""
+MediaPipe Hands shared by the letter/number tracking endpoints.
+
+A Hands graph is not thread-safe, so instead of one module-global instance
+used from every request thread, frames are handed to a small fixed pool of
+worker threads that each own their own instance. The pool bounds how many
+graphs exist (request threads may be created per connection) and lets
+requests run MediaPipe concurrently.
+
+Requests that carry a session_id get a Hands graph of their own (bounded
+LRU), so the tracker follows that user's hand from frame to frame instead
+of being reset by other sessions' frames and falling back to palm detection.
+The pool's graphs see interleaved frames from unrelated clients, so they
+run in image mode: tracking a previous frame's hand there only wastes a
+landmark pass on the wrong crop before palm detection runs anyway.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import SimpleNamespace
+
+import mediapipe as mp
+import numpy as np
+
+from .static_frames import StaticFrameCache, frame_thumbnail
+
+mp_hands = mp.solutions.hands
+
+# Each worker owns a Hands graph (tens of MB), so the default stays small
+# even on large machines; MediaPipe releases the GIL while it runs
+HANDS_WORKERS = int(os.environ.get("SIGNWAVE_HANDS_WORKERS", str(min(4, os.cpu_count() or 2))))
+
+# model_complexity=0 is MediaPipe's lite hand landmark model.
+# SIGNWAVE_MAX_HANDS=1 halves landmark work when only one hand needs tracking.
+HANDS_OPTIONS = dict(
+    static_image_mode=False,
+    max_num_hands=int(os.environ.get("SIGNWAVE_MAX_HANDS", "2")),
+    min_detection_confidence=0.5,
+    min_tracking_confidence=0.5,
+    model_complexity=0,
+)
+
+# MediaPipe Tasks bundle (float16 palm detector + hand landmark models). When
+# present it replaces the legacy mp.solutions.hands graph; download from
+# https://storage.googleapis.com/mediapipe-models/hand_landmarker/hand_landmarker/float16/latest/hand_landmarker.task
+HAND_LANDMARKER_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "pretrained", "hand_landmarker.task"
+)
+USE_HAND_LANDMARKER = os.path.exists(HAND_LANDMARKER_PATH)
+
+# SIGNWAVE_HANDS_DELEGATE=gpu runs the HandLandmarker models on the GPU
+# (MediaPipe's GPU delegate; needs a GPU-enabled mediapipe build)
+HANDS_DELEGATE = os.environ.get("SIGNWAVE_HANDS_DELEGATE", "cpu").lower()
+
+_local = threading.local()
+
+
+class _TasksHands:
+    """
+    HandLandmarker behind the legacy Hands.process() interface. VIDEO mode
+    tracks between frames like static_image_mode=False; IMAGE mode runs
+    palm detection on every frame.
+    """
+
+    def __init__(self, video=True):
+        vision = mp.tasks.vision
+        BaseOptions = mp.tasks.BaseOptions
+        delegate = BaseOptions.Delegate.GPU if HANDS_DELEGATE == "gpu" else BaseOptions.Delegate.CPU
+        options = vision.HandLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=HAND_LANDMARKER_PATH, delegate=delegate),
+            running_mode=vision.RunningMode.VIDEO if video else vision.RunningMode.IMAGE,
+            num_hands=HANDS_OPTIONS["max_num_hands"],
+            min_hand_detection_confidence=HANDS_OPTIONS["min_detection_confidence"],
+            min_tracking_confidence=HANDS_OPTIONS["min_tracking_confidence"],
+        )
+        self._landmarker = vision.HandLandmarker.create_from_options(options)
+        self._video = video
+        self._last_timestamp_ms = -1
+
+    def process(self, rgb_frame):
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb_frame))
+        if self._video:
+            # VIDEO mode needs strictly increasing timestamps per landmarker
+            timestamp_ms = max(int(time.monotonic() * 1000), self._last_timestamp_ms + 1)
+            self._last_timestamp_ms = timestamp_ms
+            result = self._landmarker.detect_for_video(image, timestamp_ms)
+        else:
+            result = self._landmarker.detect(image)
+        # Same shape the views read from mp.solutions.hands results
+        return SimpleNamespace(
+            multi_hand_landmarks=[SimpleNamespace(landmark=hand) for hand in result.hand_landmarks] or None
+        )
+
+    def close(self):
+        self._landmarker.close()
+
+
+def _new_hands(video=True):
+    if USE_HAND_LANDMARKER:
+        return _TasksHands(video)
+    return mp_hands.Hands(**dict(HANDS_OPTIONS, static_image_mode=not video))
+
+
+def _get_hands():
+    """This worker thread's (image mode) Hands instance, built on first use."""
+    hands = getattr(_local, "hands", None)
+    if hands is None:
+        hands = _local.hands = _new_hands(video=False)
+    return hands
+
+
+class _SessionHands:
+    """
+    A session's own Hands graph; the lock covers the rare overlapping frame
+    and an evicted graph is only closed once the frame using it has
+    finished. A closed graph's process() returns None.
+    """
+
+    def __init__(self):
+        self.hands = _new_hands()
+        self.lock = threading.Lock()
+
+    def process(self, rgb_frame):
+        with self.lock:
+            if self.hands is None:
+                return None
+            return self.hands.process(rgb_frame)
+
+    def close(self):
+        with self.lock:
+            if self.hands is not None:
+                self.hands.close()
+                self.hands = None
+
+
+MAX_SESSION_HANDS = int(os.environ.get("SIGNWAVE_MAX_SESSION_HANDS", "32"))
+_session_hands = OrderedDict()  # session_id -> _SessionHands, least recently used first
+_session_hands_lock = threading.Lock()
+
+
+def _hands_for_session(session_id):
+    """Get or create the session's Hands graph, closing the LRU one when full."""
+    with _session_hands_lock:
+        entry = _session_hands.get(session_id)
+        if entry is not None:
+            _session_hands.move_to_end(session_id)
+            return entry
+
+    # Building a graph takes a while; don't hold the lock for it
+    created = _SessionHands()
+    discard = None
+    with _session_hands_lock:
+        entry = _session_hands.get(session_id)
+        if entry is not None:
+            discard = created
+        else:
+            entry = _session_hands[session_id] = created
+            if len(_session_hands) > MAX_SESSION_HANDS:
+                _, discard = _session_hands.popitem(last=False)
+    if discard is not None:
+        discard.close()
+    return entry
+
+
+def _warm_up_worker():
+    # Build the graph and run it once so the first real frame isn't slow
+    _get_hands().process(np.zeros((192, 192, 3), dtype=np.uint8))
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """
+    The mp-hands executor, created on first use in this process. A worker
+    forked from a parent that already had one (gunicorn --preload) doesn't
+    inherit its threads, so it builds its own instead of queueing forever.
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool_pid != pid:
+        with _pool_lock:
+            if _pool_pid != pid:
+                _pool = ThreadPoolExecutor(max_workers=HANDS_WORKERS, thread_name_prefix="mp-hands")
+                _pool_pid = pid
+    return _pool
+
+
+def process_hands(rgb_frame):
+    """Run MediaPipe Hands on an RGB frame; returns the MediaPipe results."""
+    return _get_pool().submit(lambda: _get_hands().process(rgb_frame)).result()
+
+
+# session_id -> (rgb_frame, future) waiting for a worker; at most one per session
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def _process_pending(session_id):
+    with _pending_lock:
+        rgb_frame, future = _pending.pop(session_id)
+    try:
+        results = _hands_for_session(session_id).process(rgb_frame)
+        if results is None:
+            # The graph was evicted between lookup and process(); use a fresh one
+            results = _hands_for_session(session_id).process(rgb_frame)
+        future.set_result(results)
+    except Exception as e:
+        future.set_exception(e)
+
+
+def process_hands_latest(session_id, rgb_frame):
+    """
+    Like process_hands, but coalesces frames per session: if this session
+    already has a frame waiting for a worker, that frame is dropped in favour
+    of this newer one and its caller gets None back. A client that posts
+    faster than MediaPipe runs then waits at most one inference instead of
+    queueing up a backlog of stale frames.
+    """
+    future = Future()
+    with _pending_lock:
+        superseded = _pending.get(session_id)
+        _pending[session_id] = (rgb_frame, future)
+    if superseded is not None:
+        superseded[1].set_result(None)
+    else:
+        _get_pool().submit(_process_pending, session_id)
+    return future.result()
+
+
+# Results of the last frame MediaPipe actually ran on, per session
+_static_frames = StaticFrameCache()
+
+
+def track_frame(rgb_frame, session_id=None):
+    """
+    Entry point for the views: coalesce per session when the client sends a
+    session_id, otherwise just run the frame. None means "superseded".
+
+    With a session_id, a frame that is practically identical to the last one
+    processed for that session (client holding still) returns the previous
+    results without running MediaPipe.
+    """
+    if not session_id:
+        return process_hands(rgb_frame)
+
+    thumbnail = frame_thumbnail(rgb_frame)
+    results = _static_frames.lookup(session_id, thumbnail)
+    if results is not None:
+        return results
+
+    results = process_hands_latest(session_id, rgb_frame)
+    if results is not None:
+        _static_frames.store(session_id, thumbnail, results)
+    return results
+
+
+def warm_up():
+    """Start building every worker's Hands graph in the background (AppConfig.ready)."""
+    pool = _get_pool()
+    for _ in range(HANDS_WORKERS):
+        pool.submit(_warm_up_worker)
@@ -1,12 +1,25 @@
 """
 Improved SigLIP model wrapper with preprocessing and temporal smoothing
 """
+import os
+import threading
+
 import cv2
 import numpy as np
 from PIL import Image
 import torch
-import mediapipe as mp
-from collections import deque
+
+from .batching import BatchedInferenceQueue
+from .frame_buffer import SessionBufferCache
+from .hand_tracking import process_hands
+
+# The batcher's single thread runs every forward pass, so torch keeps its
+# default intra-op pool (all cores); SIGNWAVE_TORCH_THREADS caps it explicitly
+if os.environ.get("SIGNWAVE_TORCH_THREADS"):
+    torch.set_num_threads(int(os.environ["SIGNWAVE_TORCH_THREADS"]))
+
+# Class index -> letter for the SigLIP alphabet classifier
+LETTERS = [chr(ord('A') + i) for i in range(26)]
 
 class ImprovedSigLIPModel:
     def __init__(self, model, processor, smoothing_window=5, confidence_threshold=0.3):
@@ -24,17 +37,28 @@ class ImprovedSigLIPModel:
         self.smoothing_window = smoothing_window
         self.confidence_threshold = confidence_threshold
         
-        # Initialize MediaPipe for hand detection
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=True,
-            max_num_hands=1,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        # Per-thread CLAHE, created once instead of on every frame
+        self._local = threading.local()
         
-        # Buffer for temporal smoothing
-        self.prediction_buffer = deque(maxlen=smoothing_window)
+        # Per-session ring buffers of the last `smoothing_window` probability
+        # vectors (bounded LRU + idle TTL), so concurrent users' streams are
+        # smoothed separately; the lock covers overlapping frames of one session
+        self._smoothing = SessionBufferCache(smoothing_window, (len(LETTERS),), maxsize=256, ttl=600)
+        self._smoothing_lock = threading.Lock()
+        
+        # Frames from concurrent streams share one forward pass
+        self._batcher = BatchedInferenceQueue(
+            self._forward_batch,
+            max_batch_size=8,
+            name="siglip-batcher",
+        )
+    
+    @torch.inference_mode()
+    def _forward_batch(self, pixel_values):
+        """Run the vision tower on a (B, C, H, W) batch and return (B, num_classes) probabilities"""
+        pixel_values = torch.from_numpy(pixel_values).to(self.model.device)
+        logits = self.model(pixel_values=pixel_values).logits
+        return torch.nn.functional.softmax(logits, dim=1).cpu().numpy()
         
     def detect_and_crop_hand(self, image):
         """
@@ -44,12 +68,12 @@ class ImprovedSigLIPModel:
             cropped_image: PIL Image of cropped hand, or original if no hand detected
             hand_detected: bool indicating if hand was found
         """
-        # Convert PIL to numpy array
-        img_array = np.array(image)
-        rgb_image = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+        # PIL image is already RGB, which is what MediaPipe expects
+        img_array = np.asarray(image)
         
-        # Detect hands
-        results = self.hands.process(cv2.cvtColor(rgb_image, cv2.COLOR_BGR2RGB))
+        # Detect hands on hand_tracking's worker pool (image-mode graphs, one
+        # per worker thread) instead of a single graph shared by every request
+        results = process_hands(img_array)
         
         if not results.multi_hand_landmarks:
             return image, False
@@ -59,11 +83,10 @@ class ImprovedSigLIPModel:
         
         # Get bounding box
         h, w = img_array.shape[:2]
-        x_coords = [landmark.x * w for landmark in hand_landmarks.landmark]
-        y_coords = [landmark.y * h for landmark in hand_landmarks.landmark]
+        coords = np.array([(landmark.x, landmark.y) for landmark in hand_landmarks.landmark]) * (w, h)
         
-        x_min, x_max = int(min(x_coords)), int(max(x_coords))
-        y_min, y_max = int(min(y_coords)), int(max(y_coords))
+        x_min, y_min = coords.min(axis=0).astype(int).tolist()
+        x_max, y_max = coords.max(axis=0).astype(int).tolist()
         
         # Add padding (20% of bounding box size)
         padding_x = int((x_max - x_min) * 0.2)
@@ -82,31 +105,37 @@ class ImprovedSigLIPModel:
         target_size = max(crop_h, crop_w)
         
         # Create square image with padding
-        square_img = np.ones((target_size, target_size, 3), dtype=np.uint8) * 255
+        square_img = np.full((target_size, target_size, 3), 255, dtype=np.uint8)
         y_offset = (target_size - crop_h) // 2
         x_offset = (target_size - crop_w) // 2
         square_img[y_offset:y_offset+crop_h, x_offset:x_offset+crop_w] = cropped
         
         return Image.fromarray(square_img), True
     
+    def _get_clahe(self):
+        """CLAHE object for the calling thread (they keep internal scratch buffers)"""
+        clahe = getattr(self._local, "clahe", None)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            self._local.clahe = clahe
+        return clahe
+    
     def preprocess_image(self, image):
         """
         Preprocess image: enhance contrast, normalize, etc.
         """
         # Convert to numpy array
-        img_array = np.array(image)
+        img_array = np.asarray(image)
         
         # Convert to LAB color space for better contrast enhancement
         lab = cv2.cvtColor(img_array, cv2.COLOR_RGB2LAB)
-        l, a, b = cv2.split(lab)
         
         # Apply CLAHE (Contrast Limited Adaptive Histogram Equalization)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        l = clahe.apply(l)
+        # to the L channel only and write it back in place
+        l = cv2.extractChannel(lab, 0)
+        lab = cv2.insertChannel(self._get_clahe().apply(l), lab, 0)
         
-        # Merge back
-        enhanced = cv2.merge([l, a, b])
-        enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2RGB)
+        enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
         
         return Image.fromarray(enhanced)
     
@@ -120,7 +149,7 @@ class ImprovedSigLIPModel:
             use_preprocessing: Whether to apply image enhancement
         
         Returns:
-            predictions: dict of {letter: confidence}
+            probs: (26,) float32 array of letter probabilities, indexed like LETTERS
         """
         processed_image = image
         
@@ -136,71 +165,67 @@ class ImprovedSigLIPModel:
             processed_image = self.preprocess_image(processed_image)
         
         # Process with SigLIP
-        inputs = self.processor(images=processed_image, return_tensors="pt")
-        
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            logits = outputs.logits
-            probs = torch.nn.functional.softmax(logits, dim=1).squeeze().tolist()
-        
-        # Map to letters
-        labels = {
-            "0": "A", "1": "B", "2": "C", "3": "D", "4": "E", "5": "F", "6": "G", "7": "H", "8": "I", "9": "J",
-            "10": "K", "11": "L", "12": "M", "13": "N", "14": "O", "15": "P", "16": "Q", "17": "R", "18": "S", "19": "T",
-            "20": "U", "21": "V", "22": "W", "23": "X", "24": "Y", "25": "Z"
-        }
-        
-        predictions = {labels[str(i)]: probs[i] for i in range(len(probs))}
-        
-        return predictions
+        inputs = self.processor(images=processed_image, return_tensors="np")
+        return self._batcher.predict(inputs["pixel_values"][0], timeout=10)
     
-    def predict_with_smoothing(self, image, use_hand_crop=True, use_preprocessing=True):
+    def predict_with_smoothing(self, image, session_id="default", use_hand_crop=True, use_preprocessing=True):
         """
-        Make prediction with temporal smoothing
+        Make prediction with temporal smoothing over this session's recent frames
         
         Args:
             image: PIL Image
+            session_id: Whose smoothing window the frame belongs to
             use_hand_crop: Whether to crop to hand region
             use_preprocessing: Whether to apply image enhancement
         
         Returns:
-            smoothed_predictions: dict of {letter: averaged_confidence}
-            raw_predictions: dict of current frame predictions
+            smoothed_probs: (26,) array averaged over the smoothing window
+            raw_probs: (26,) array for the current frame
         """
         # Get current prediction
-        raw_predictions = self.predict_single(image, use_hand_crop, use_preprocessing)
-        
-        # Add to buffer
-        self.prediction_buffer.append(raw_predictions)
-        
-        # Average predictions in buffer
-        if len(self.prediction_buffer) == 0:
-            return raw_predictions, raw_predictions
+        raw_probs = self.predict_single(image, use_hand_crop, use_preprocessing)
         
-        # Calculate average probabilities
-        smoothed = {}
-        for letter in raw_predictions.keys():
-            avg_conf = sum(pred[letter] for pred in self.prediction_buffer) / len(self.prediction_buffer)
-            smoothed[letter] = avg_conf
+        # Add to the session's ring buffer
+        with self._smoothing_lock:
+            buffer = self._smoothing.get(session_id)
+            buffer.push(raw_probs)
+            smoothed = buffer.window().mean(axis=0)
         
-        return smoothed, raw_predictions
+        return smoothed, raw_probs
     
-    def get_top_prediction(self, predictions):
+    def buffer_size(self, session_id="default"):
+        """Number of frames currently in the session's smoothing window"""
+        with self._smoothing_lock:
+            return len(self._smoothing.get(session_id))
+    
+    @staticmethod
+    def to_letter_dict(probs):
+        """Convert a probability array to {letter: confidence} for API responses"""
+        return dict(zip(LETTERS, probs.tolist()))
+    
+    @staticmethod
+    def top_k(probs, k=5):
+        """[(letter, confidence), ...] for the k most likely letters, best first"""
+        idx = np.argpartition(probs, -k)[-k:]
+        idx = idx[np.argsort(probs[idx])[::-1]]
+        return [(LETTERS[i], float(probs[i])) for i in idx]
+    
+    def get_top_prediction(self, probs):
         """
         Get top prediction with confidence check
         
         Returns:
             (letter, confidence) or (None, 0) if below threshold
         """
-        sorted_preds = sorted(predictions.items(), key=lambda x: x[1], reverse=True)
-        top_letter, top_conf = sorted_preds[0]
+        top_idx = int(probs.argmax())
+        top_letter, top_conf = LETTERS[top_idx], float(probs[top_idx])
         
         if top_conf >= self.confidence_threshold:
             return top_letter, top_conf
         else:
             return None, top_conf
     
-    def reset_buffer(self):
-        """Reset the prediction buffer"""
-        self.prediction_buffer.clear()
-
+    def reset_buffer(self, session_id="default"):
+        """Reset the session's prediction buffer"""
+        with self._smoothing_lock:
+            self._smoothing.pop(session_id)
@@ -6,66 +6,263 @@ os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
 # 2. Quiet TF a bit (optional)
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "1"  # 0 = all logs
 
-# 3. Disable XLA JIT
-os.environ["TF_XLA_FLAGS"] = "--tf_xla_enable_xla_devices=false --tf_xla_auto_jit=0"
+# 3. SIGNWAVE_DEBUG=1 runs TF functions eagerly (step-through debugging of custom layers)
+SIGNWAVE_DEBUG = os.environ.get("SIGNWAVE_DEBUG", "") == "1"
 
-import json
+import logging
+import queue
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 import numpy as np
+import orjson
 import tensorflow as tf
 import mediapipe as mp
 
-# 4. Extra safety: turn off graph JIT and run functions eagerly
-try:
-    tf.config.optimizer.set_jit(False)
-except Exception:
-    pass
-
-tf.config.run_functions_eagerly(True)
+if SIGNWAVE_DEBUG:
+    tf.config.run_functions_eagerly(True)
 
+from .batching import BatchedInferenceQueue
+from .frame_buffer import RedisSessionBuffers, SessionBufferCache
 from .src.backbone import TFLiteModel, get_model
 from .src.config import SEQ_LEN, THRESH_HOLD
 from .src.landmarks_extraction import extract_coordinates
 
+logger = logging.getLogger(__name__)
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-# 1) Load model weights exactly like the repo
+# 1) ISLR model, loaded on first use so Django starts (and serves non-ISLR
+#    routes) without paying for it. Prefer a quantized TFLite flatbuffer
+#    produced by convert_islr_to_tflite.py; fall back to the Keras weights.
+TFLITE_MODELS_PATH = [
+    os.path.join(BASE_DIR, "api", "pretrained", "islr-int8.tflite"),
+    os.path.join(BASE_DIR, "api", "pretrained", "islr-fp16.tflite"),
+]
 MODELS_PATH = [
     os.path.join(BASE_DIR, "api", "pretrained", "islr-fp16-192-8-seed_all42-foldall-last.h5"),
 ]
 
-_keras_models = [get_model(max_len=SEQ_LEN) for _ in MODELS_PATH]
-for m, p in zip(_keras_models, MODELS_PATH):
-    print(f"[*] Loading weights from {p}")
-    m.load_weights(p, by_name=True, skip_mismatch=True)
 
-islr_model = TFLiteModel(islr_models=_keras_models)
+# Padded batch shapes for the Keras path, and how long a request waits for
+# its batch before giving up (instead of hanging if the batcher stalls)
+ISLR_BATCH_SIZES = (1, 2, 4, 8, 16)
+ISLR_PREDICT_TIMEOUT = float(os.environ.get("SIGNWAVE_ISLR_TIMEOUT", "10"))
+
+
+class TFLiteInterpreterModel:
+    """
+    Runs a converted ISLR flatbuffer with the TFLite interpreter (recent TF
+    releases apply the XNNPACK CPU delegate by default).
+    Same call contract as TFLiteModel: model(frames)["outputs"].
+
+    Interpreters are not thread-safe, so concurrent requests check one out
+    of a small pool instead of serializing on a single instance.
+    """
+
+    def __init__(self, model_path, num_threads=None, pool_size=2):
+        num_threads = num_threads or max(1, (os.cpu_count() or 2) // pool_size)
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+            interpreter.allocate_tensors()
+            self._pool.put(_PooledInterpreter(interpreter))
+
+    def __call__(self, inputs):
+        inputs = np.asarray(inputs, dtype=np.float32)
+        pooled = self._pool.get()
+        try:
+            outputs = pooled.run(inputs)
+        finally:
+            self._pool.put(pooled)
+        return {"outputs": outputs}
+
+
+class _PooledInterpreter:
+    """One interpreter plus its cached tensor indices and current input shape."""
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.input_index = interpreter.get_input_details()[0]["index"]
+        self.output_index = interpreter.get_output_details()[0]["index"]
+        self.input_shape = tuple(interpreter.get_input_details()[0]["shape"])
+
+    def run(self, inputs):
+        if self.input_shape != inputs.shape:
+            self.interpreter.resize_tensor_input(self.input_index, inputs.shape)
+            self.interpreter.allocate_tensors()
+            self.input_shape = inputs.shape
+        self.interpreter.set_tensor(self.input_index, inputs)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index).copy()
+
+
+def _load_keras_islr():
+    """
+    Build the XLA-compiled Keras ensemble behind its batching queue; returns a
+    callable with TFLiteModel's contract, model(frames)["outputs"].
+    """
+    keras_models = [get_model(max_len=SEQ_LEN) for _ in MODELS_PATH]
+    for m, p in zip(keras_models, MODELS_PATH):
+        logger.info("Loading weights from %s", p)
+        m.load_weights(p, by_name=True, skip_mismatch=True)
+
+    islr_module = TFLiteModel(islr_models=keras_models)
+
+    # Compile preprocessing + Transformer into one fused XLA graph.
+    # (Kept outside TFLiteModel so convert_islr_to_tflite.py still sees a plain graph.)
+    predict_batch = tf.function(
+        islr_module.predict_batch,
+        jit_compile=not SIGNWAVE_DEBUG,
+        input_signature=[tf.TensorSpec(shape=[None, SEQ_LEN, 543, 3], dtype=tf.float32, name="inputs")],
+    )
+
+    # Sessions that fill their buffer at the same time share one forward pass.
+    # XLA compiles once per batch shape, so batches are padded to a few fixed
+    # sizes and each is compiled here rather than on a live request.
+    batcher = BatchedInferenceQueue(
+        lambda batch: predict_batch(batch).numpy(),
+        max_batch_size=16,
+        name="islr-batcher",
+        batch_sizes=ISLR_BATCH_SIZES,
+    )
+    batcher.warm_up((SEQ_LEN, 543, 3))
+    return lambda frames: {"outputs": batcher.predict(frames, timeout=ISLR_PREDICT_TIMEOUT)}
+
+
+@lru_cache(maxsize=1)
+def _load_islr():
+    """
+    Load the ISLR model on first use; None if loading failed. Either way the
+    result is called as model(frames)["outputs"].
+    """
+    try:
+        tflite_path = next((p for p in TFLITE_MODELS_PATH if os.path.exists(p)), None)
+        if tflite_path is not None:
+            logger.info("Loading TFLite model from %s", tflite_path)
+            return TFLiteInterpreterModel(tflite_path)
+        return _load_keras_islr()
+    except Exception:
+        logger.exception("Failed to load ISLR model")
+        return None
+
+
+# lru_cache does not stop two threads from both running the loader
+_islr_load_lock = threading.Lock()
+
+def get_islr_model():
+    """The ISLR model (loaded on first call), or None if it failed to load."""
+    with _islr_load_lock:
+        return _load_islr()
+
+
+def predict_islr(seq):
+    """Run one (SEQ_LEN, 543, 3) landmark sequence; returns (NUM_CLASSES,) probabilities."""
+    model = get_islr_model()
+    if model is None:
+        raise RuntimeError("ISLR model not loaded")
+    return np.asarray(model(seq)["outputs"])
 
 # 2) Load label map (index -> sign)
 LABEL_MAP_PATH = os.path.join(BASE_DIR, "api", "pretrained", "sign_to_prediction_index_map.json")
-with open(LABEL_MAP_PATH, "r", encoding="utf-8") as f:
-    sign_to_idx = json.load(f)
+with open(LABEL_MAP_PATH, "rb") as f:
+    sign_to_idx = orjson.loads(f.read())
 
 idx_to_sign = {int(v): k for k, v in sign_to_idx.items()}
 
 # 3) MediaPipe Holistic - Create per-session instances to avoid timestamp conflicts
 mp_holistic = mp.solutions.holistic
-# Global holistic instance (for backward compatibility)
-holistic = mp_holistic.Holistic(
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5,
-)
 
-# Per-session holistic instances to avoid timestamp mismatch errors
-holistic_instances = {}
+# Global holistic instance (for backward compatibility), built on first use
+@lru_cache(maxsize=1)
+def get_global_holistic():
+    return mp_holistic.Holistic(
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+    )
 
-def get_holistic_for_session(session_id):
-    """Get or create a holistic instance for a specific session"""
-    if session_id not in holistic_instances:
-        holistic_instances[session_id] = mp_holistic.Holistic(
+# Per-session holistic instances to avoid timestamp mismatch errors.
+# Bounded LRU: each Holistic graph holds tens of MB, so the least recently
+# used session's instance is closed once the pool is full.
+MAX_HOLISTIC_INSTANCES = 32
+holistic_instances = OrderedDict()  # session_id -> _SessionHolistic, least recently used first
+_holistic_lock = threading.Lock()
+
+
+class _SessionHolistic:
+    """
+    A session's Holistic graph behind its own lock, so overlapping frames of
+    one session take turns and an evicted graph is only closed once the
+    frame using it has finished. A closed graph's process() returns None.
+    """
+
+    def __init__(self):
+        self.holistic = mp_holistic.Holistic(
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5,
         )
-    return holistic_instances[session_id]
+        self.lock = threading.Lock()
+
+    def process(self, rgb_frame):
+        with self.lock:
+            if self.holistic is None:
+                return None
+            return self.holistic.process(rgb_frame)
+
+    def close(self):
+        with self.lock:
+            if self.holistic is not None:
+                self.holistic.close()
+                self.holistic = None
+
+
+def get_holistic_for_session(session_id):
+    """Get or create a holistic instance for a specific session"""
+    with _holistic_lock:
+        instance = holistic_instances.get(session_id)
+        if instance is not None:
+            holistic_instances.move_to_end(session_id)
+            return instance
+
+    # Building a graph takes a while; don't hold the pool lock for it
+    created = _SessionHolistic()
+    discard = None
+    with _holistic_lock:
+        instance = holistic_instances.get(session_id)
+        if instance is not None:
+            discard = created
+        else:
+            instance = holistic_instances[session_id] = created
+            if len(holistic_instances) > MAX_HOLISTIC_INSTANCES:
+                _, discard = holistic_instances.popitem(last=False)
+    # Closing waits for any frame still running on that graph
+    if discard is not None:
+        discard.close()
+    return instance
+
+def release_holistic_for_session(session_id):
+    """Close and drop a session's holistic instance (session end / reset)"""
+    with _holistic_lock:
+        instance = holistic_instances.pop(session_id, None)
+    if instance is not None:
+        instance.close()
+
+# 4) Per-session sequence buffers: (SEQ_LEN, 543, 3) float32 ring buffers
+#    (~200 KB each), bounded by an LRU + idle TTL so abandoned sessions don't leak.
+#    With SIGNWAVE_REDIS_URL set they live in Redis instead, so a session's
+#    frames can land on any worker process.
+SIGNWAVE_REDIS_URL = os.environ.get("SIGNWAVE_REDIS_URL")
+if SIGNWAVE_REDIS_URL:
+    import redis
+    sequence_buffers = RedisSessionBuffers(redis.Redis.from_url(SIGNWAVE_REDIS_URL), SEQ_LEN, (543, 3), ttl=600)
+else:
+    sequence_buffers = SessionBufferCache(SEQ_LEN, (543, 3), maxsize=256, ttl=600)
+
 
-# 4) Per-session sequence buffers
-sequence_buffers = {}
+def __getattr__(name):
+    """Keep `islr_loader.islr_model` / `islr_loader.holistic` working, lazily (PEP 562)."""
+    if name == "islr_model":
+        return get_islr_model()
+    if name == "holistic":
+        return get_global_holistic()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
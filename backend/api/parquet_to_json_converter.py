@@ -3,10 +3,14 @@ Utility to convert ASL-signs parquet files to JSON format for frontend consumpti
 """
 import pandas as pd
 import numpy as np
-import json
+import orjson
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# Only the columns the JSON needs; skips decoding row_id and friends
+PARQUET_COLUMNS = ['frame', 'type', 'landmark_index', 'x', 'y', 'z']
+
 
 def convert_parquet_to_json(parquet_path, output_path=None):
     """
@@ -20,57 +24,69 @@ def convert_parquet_to_json(parquet_path, output_path=None):
         dict: JSON-serializable dictionary with landmark data
     """
     # Read the parquet file
-    df = pd.read_parquet(parquet_path)
-
-    # Get unique frames
-    frames = sorted(df['frame'].unique())
-
-    # Structure data by frames
+    df = pd.read_parquet(parquet_path, engine='pyarrow', columns=PARQUET_COLUMNS)
+
+    # Order rows by frame; a stable sort keeps the landmark order within a frame
+    df = df.sort_values('frame', kind='stable')
+    frame_values = df['frame'].to_numpy()
+
+    # Convert to float and replace NaN/Inf with 0 in one pass
+    coords = np.nan_to_num(
+        df[['x', 'y', 'z']].to_numpy(dtype=np.float64),
+        nan=0.0, posinf=0.0, neginf=0.0,
+    )
+
+    landmarks_all = [
+        {'type': t, 'landmark_index': i, 'x': x, 'y': y, 'z': z}
+        for t, i, x, y, z in zip(
+            df['type'].tolist(),
+            df['landmark_index'].to_numpy(dtype=np.int64).tolist(),
+            coords[:, 0].tolist(),
+            coords[:, 1].tolist(),
+            coords[:, 2].tolist(),
+        )
+    ]
+
+    # Structure data by frames: split the sorted rows where the frame number changes
     frames_data = []
-    for frame_num in frames:
-        frame_df = df[df['frame'] == frame_num]
-
-        landmarks = []
-        for _, row in frame_df.iterrows():
-            # Convert to float and handle NaN/Inf values
-            x = float(row['x']) if pd.notna(row['x']) else 0.0
-            y = float(row['y']) if pd.notna(row['y']) else 0.0
-            z = float(row['z']) if pd.notna(row['z']) else 0.0
-
-            # Replace inf with 0
-            x = 0.0 if not np.isfinite(x) else x
-            y = 0.0 if not np.isfinite(y) else y
-            z = 0.0 if not np.isfinite(z) else z
-
-            landmarks.append({
-                'type': row['type'],
-                'landmark_index': int(row['landmark_index']),
-                'x': x,
-                'y': y,
-                'z': z
-            })
-
-        frames_data.append({
-            'frame': int(frame_num),
-            'landmarks': landmarks
-        })
+    if len(frame_values):
+        bounds = (np.flatnonzero(frame_values[1:] != frame_values[:-1]) + 1).tolist()
+        starts = [0] + bounds
+        ends = bounds + [len(frame_values)]
+        frames_data = [
+            {'frame': int(frame_values[start]), 'landmarks': landmarks_all[start:end]}
+            for start, end in zip(starts, ends)
+        ]
 
     result = {
-        'total_frames': len(frames),
+        'total_frames': len(frames_data),
         'frames': frames_data
     }
 
     # Save to file if output path provided
     if output_path:
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w') as f:
-            json.dump(result, f, indent=2)
+        # Same layout and values as the old json.dump(indent=2) files, but not
+        # byte-identical: orjson spells some floats differently (1e-05 ->
+        # 0.00001, -3.2e-07 -> -3.2e-7), so regenerated files diff/hash anew
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
         print(f"Saved JSON to {output_path}")
 
     return result
 
 
-def batch_convert_signs(asl_signs_dir, train_csv_path, output_dir, limit=None):
+def _convert_worker(task):
+    """Process-pool entry point: convert one (sign, parquet_path, output_path) triple."""
+    sign, parquet_path, output_path = task
+    try:
+        convert_parquet_to_json(parquet_path, output_path)
+        return sign, None
+    except Exception as e:
+        return sign, str(e)
+
+
+def batch_convert_signs(asl_signs_dir, train_csv_path, output_dir, limit=None, max_workers=None):
     """
     Batch convert parquet files to JSON for specific signs.
 
@@ -79,44 +95,42 @@ def batch_convert_signs(asl_signs_dir, train_csv_path, output_dir, limit=None):
         train_csv_path: Path to train.csv
         output_dir: Directory to save JSON files
         limit: Optional limit on number of signs to convert (for testing)
+        max_workers: Worker processes to convert with (defaults to os.cpu_count())
     """
     # Read train.csv to get sign mappings
-    train_df = pd.read_csv(train_csv_path)
-
-    # Group by sign to get one example per sign
-    signs_processed = {}
-    count = 0
-
-    for _, row in train_df.iterrows():
-        sign = row['sign']
+    train_df = pd.read_csv(train_csv_path, usecols=['path', 'sign'])
 
+    # Collect one example per sign (first occurrence) up front
+    tasks = []
+    seen = set()
+    for sign, rel_path in zip(train_df['sign'].tolist(), train_df['path'].tolist()):
         # Skip if we already have this sign
-        if sign in signs_processed:
+        if sign in seen:
             continue
 
         # Construct parquet file path
-        parquet_path = os.path.join(asl_signs_dir, row['path'])
+        parquet_path = os.path.join(asl_signs_dir, rel_path)
 
         if not os.path.exists(parquet_path):
             print(f"Warning: File not found: {parquet_path}")
             continue
 
-        # Convert to JSON
-        output_path = os.path.join(output_dir, 'words', f'{sign}.json')
+        seen.add(sign)
+        tasks.append((sign, parquet_path, os.path.join(output_dir, 'words', f'{sign}.json')))
 
-        try:
-            convert_parquet_to_json(parquet_path, output_path)
-            signs_processed[sign] = True
-            count += 1
+        if limit and len(tasks) >= limit:
+            break
 
-            if limit and count >= limit:
-                break
-
-        except Exception as e:
-            print(f"Error converting {sign}: {e}")
-            continue
+    # Each file is independent, so convert them in parallel
+    signs_processed = {}
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        for sign, error in executor.map(_convert_worker, tasks, chunksize=8):
+            if error is not None:
+                print(f"Error converting {sign}: {error}")
+                continue
+            signs_processed[sign] = True
 
-    print(f"\nConverted {count} signs to JSON format")
+    print(f"\nConverted {len(signs_processed)} signs to JSON format")
     return signs_processed
 
 
@@ -147,8 +161,9 @@ def create_reference_from_recording(landmarks_sequence, sign_name, sign_type, ou
     output_path = os.path.join(output_dir, sign_type, f'{sign_name}.json')
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    with open(output_path, 'w') as f:
-        json.dump(result, f, indent=2)
+    # Recorded landmarks may still hold NumPy scalars; orjson writes them directly
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
 
     print(f"Created reference sign: {output_path}")
     return result
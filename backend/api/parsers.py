@@ -0,0 +1,20 @@
+"""
+DRF parsers for the API.
+"""
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class ORJSONParser(BaseParser):
+    """
+    JSON parser backed by orjson. The frame endpoints receive base64 images
+    inside JSON bodies, so parsing speed matters on every request.
+    """
+    media_type = 'application/json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
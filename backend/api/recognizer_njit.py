@@ -0,0 +1,99 @@
+"""
+Numba-compiled feature masks for the letter/number recognizers.
+
+Same features and bit layout as letter_feature_mask / number_feature_mask in
+views.py (see LETTER_TABLE / NUMBER_TABLE there), computed in one compiled
+scalar pass instead of a dozen small NumPy calls. The kernels release the
+GIL (nogil), so concurrent request threads can classify in parallel.
+Numba is optional: if it isn't installed, NUMBA_AVAILABLE is False and the
+views keep using NumPy.
+"""
+import math
+
+import numpy as np
+
+# Distance thresholds are compared squared, so no sqrt is needed
+THUMB_INDEX_TOUCH_SQ = 0.05 ** 2  # letter: thumb tip touching index tip
+NUMBER_TOUCH_SQ = 0.06 ** 2  # number: thumb tip touching a fingertip
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _letter_feature_mask(hand):
+    """
+    Rotation-normalize a (21, 3) float64 hand and pack its letter features.
+    No fastmath: the comparisons must round exactly like the NumPy path.
+    """
+    # Rotate so the wrist -> middle MCP vector points up (normalize_hand_rotation)
+    origin_x = hand[0, 0]
+    origin_y = hand[0, 1]
+    current_angle = math.atan2(hand[9, 1] - origin_y, hand[9, 0] - origin_x)
+    rotation_angle = -math.pi / 2 - current_angle
+    cos_theta = math.cos(rotation_angle)
+    sin_theta = math.sin(rotation_angle)
+
+    xs = np.empty(21)
+    ys = np.empty(21)
+    for i in range(21):
+        translated_x = hand[i, 0] - origin_x
+        translated_y = hand[i, 1] - origin_y
+        xs[i] = (translated_x * cos_theta - translated_y * sin_theta) + origin_x
+        ys[i] = (translated_x * sin_theta + translated_y * cos_theta) + origin_y
+
+    mask = 0
+    for f in range(4):
+        tip = 8 + 4 * f
+        mcp = 5 + 4 * f
+        pip = 6 + 4 * f
+        if ys[tip] < ys[mcp]:
+            mask |= 1 << f  # up
+        if ys[tip] > ys[pip]:
+            mask |= 1 << (4 + f)  # curved
+        if f < 2 and abs(ys[tip] - ys[mcp]) < 0.04 and abs(xs[tip] - xs[mcp]) > 0.05:
+            mask |= 1 << (8 + f)  # sideways (index, middle)
+
+    if xs[4] > xs[5] + 0.06:
+        mask |= 1 << 10  # thumb out sideways
+    dx = xs[4] - xs[8]
+    dy = ys[4] - ys[8]
+    if dx * dx + dy * dy < THUMB_INDEX_TOUCH_SQ:
+        mask |= 1 << 11  # thumb touching index
+    if abs(ys[4] - ys[12]) < 0.07 or abs(ys[4] - ys[16]) < 0.07:
+        mask |= 1 << 12  # thumb level with middle/ring tip
+    return mask
+
+
+def _number_feature_mask(hand):
+    """Pack the number features of a (21, 3) float64 hand."""
+    mask = 0
+    for f in range(4):
+        tip = 8 + 4 * f
+        if hand[tip, 1] < hand[5 + 4 * f, 1] - 0.05:
+            mask |= 1 << f  # up
+        dx = hand[tip, 0] - hand[4, 0]
+        dy = hand[tip, 1] - hand[4, 1]
+        if dx * dx + dy * dy < NUMBER_TOUCH_SQ:
+            mask |= 1 << (5 + f)  # thumb touching this fingertip
+    if hand[4, 1] < hand[3, 1] - 0.03:
+        mask |= 1 << 4  # thumb up
+    return mask
+
+
+if NUMBA_AVAILABLE:
+    letter_feature_mask = njit(cache=True, nogil=True)(_letter_feature_mask)
+    number_feature_mask = njit(cache=True, nogil=True)(_number_feature_mask)
+else:
+    letter_feature_mask = _letter_feature_mask
+    number_feature_mask = _number_feature_mask
+
+
+def warm_up():
+    """Compile (or load from cache) both kernels so the first frame doesn't pay for it."""
+    if NUMBA_AVAILABLE:
+        hand = np.zeros((21, 3), dtype=np.float64)
+        letter_feature_mask(hand)
+        number_feature_mask(hand)
@@ -0,0 +1,61 @@
+"""
+DRF renderers for the API.
+"""
+import orjson
+from django.http import HttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+_fallback_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson. NumPy arrays and scalars (landmarks,
+    probabilities) are serialized natively, without a .tolist() round trip.
+    Anything orjson can't handle (lazy translation strings, Decimal, ...)
+    goes through DRF's own encoder.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_fallback_encoder.default, option=_ORJSON_OPTIONS)
+
+
+class ORJSONResponse(HttpResponse):
+    """
+    Drop-in for django.http.JsonResponse on plain (non-DRF) views, encoded
+    with orjson and the same options as ORJSONRenderer.
+    """
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(orjson.dumps(data, default=_fallback_encoder.default, option=_ORJSON_OPTIONS), **kwargs)
+
+
+class MsgPackRenderer(BaseRenderer):
+    """
+    MessagePack renderer for clients that send `Accept: application/msgpack`.
+    Floats go out as 9-byte binary values instead of ~17 characters of text.
+    NumPy values are converted by DRF's encoder (via .tolist()).
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_fallback_encoder.default, use_bin_type=True)
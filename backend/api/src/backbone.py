@@ -305,6 +305,21 @@ class TFLiteModel(tf.Module):
         outputs = tf.keras.layers.Average()(outputs)[0]
         return {'outputs': outputs}
 
+    @tf.function(input_signature=[tf.TensorSpec(shape=[None, None, 543, 3], dtype=tf.float32, name='inputs')])
+    def predict_batch(self, inputs):
+        """
+        Batched variant of __call__ for serving several sequences at once.
+
+        Args:
+            inputs: Input tensor with shape [num_sequences, num_frames, 543, 3].
+
+        Returns:
+            Output tensor with shape [num_sequences, NUM_CLASSES].
+        """
+        x = self.prep_inputs(tf.cast(inputs, dtype=tf.float32))
+        outputs = [model(x) for model in self.islr_models]
+        return tf.keras.layers.Average()(outputs)
+
 def get_model(max_len=MAX_LEN, dropout_step=0, dim=192):
     """
     Creates a model for sequence classification using a combination of convolutional layers and transformer blocks.
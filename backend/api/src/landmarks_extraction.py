@@ -5,6 +5,8 @@ This module contains utility functions for ASL recognition using the Mediapipe l
 """
 
 from .config import ROWS_PER_FRAME, SEQ_LEN
+from itertools import chain
+from operator import attrgetter
 import json
 import cv2
 import mediapipe as mp
@@ -64,6 +66,23 @@ def draw(image, results):
                             mp_drawing.DrawingSpec(color=(227, 224, 113), thickness=3, circle_radius=3),
                             mp_drawing.DrawingSpec(color=(227, 224, 113), thickness=2, circle_radius=2))
     
+_xyz = attrgetter('x', 'y', 'z')
+
+def landmark_list_to_array(landmarks, dtype=np.float64):
+    """
+    Read a sequence of MediaPipe landmarks into an (N, 3) array in one
+    np.fromiter pass (no intermediate list of per-landmark tuples).
+
+    Args:
+        landmarks: Repeated landmark field (or list) with x, y, z attributes.
+        dtype: Output dtype.
+
+    Returns:
+        numpy.ndarray: (N, 3) array of x, y, z.
+    """
+    count = 3 * len(landmarks)
+    return np.fromiter(chain.from_iterable(map(_xyz, landmarks)), dtype=dtype, count=count).reshape(-1, 3)
+
 def extract_coordinates(results):
     """
     Extract coordinates from the prediction results.
@@ -74,11 +93,55 @@ def extract_coordinates(results):
     Returns:
         numpy.ndarray: Array of extracted coordinates.
     """
-    face = np.array([[res.x, res.y, res.z] for res in results.face_landmarks.landmark]) if results.face_landmarks else np.zeros((468, 3)) * np.nan
-    pose = np.array([[res.x, res.y, res.z] for res in results.pose_landmarks.landmark]) if results.pose_landmarks else np.zeros((33, 3)) * np.nan
-    lh = np.array([[res.x, res.y, res.z] for res in results.left_hand_landmarks.landmark]) if results.left_hand_landmarks else np.zeros((21, 3)) * np.nan
-    rh = np.array([[res.x, res.y, res.z] for res in results.right_hand_landmarks.landmark]) if results.right_hand_landmarks else np.zeros((21, 3)) * np.nan
+    face = landmark_list_to_array(results.face_landmarks.landmark) if results.face_landmarks else np.full((468, 3), np.nan)
+    pose = landmark_list_to_array(results.pose_landmarks.landmark) if results.pose_landmarks else np.full((33, 3), np.nan)
+    lh = landmark_list_to_array(results.left_hand_landmarks.landmark) if results.left_hand_landmarks else np.full((21, 3), np.nan)
+    rh = landmark_list_to_array(results.right_hand_landmarks.landmark) if results.right_hand_landmarks else np.full((21, 3), np.nan)
     return np.concatenate([face, lh, pose, rh])
+
+def hand_landmarks_to_array(hand_landmarks):
+    """
+    Read a MediaPipe hand landmark list into an array.
+
+    Args:
+        hand_landmarks: One entry of `results.multi_hand_landmarks`.
+
+    Returns:
+        numpy.ndarray: (21, 3) float32 array of x, y, z (MediaPipe's own precision).
+    """
+    return landmark_list_to_array(hand_landmarks.landmark, dtype=np.float32)
+
+def landmarks_to_dicts(landmarks):
+    """
+    Serialize an (N, 3) landmark array to the [{'x', 'y', 'z'}, ...] form the frontend expects.
+
+    Args:
+        landmarks (numpy.ndarray): Landmark array.
+
+    Returns:
+        list: One dict per landmark.
+    """
+    return [{'x': x, 'y': y, 'z': z} for x, y, z in landmarks.tolist()]
+
+def quantize_landmarks(landmarks):
+    """
+    Pack an (N, 3) landmark array into 6 bytes per landmark for compact responses.
+
+    x and y (normalized to [0, 1]) become uint16 (value * 65535), z becomes
+    int16 (value * 32767), both clipped to range. Layout: all N (x, y) pairs
+    as little-endian uint16, then all N z values as little-endian int16.
+    Decode with Uint16Array / Int16Array on the client.
+
+    Args:
+        landmarks (numpy.ndarray): Landmark array without NaNs.
+
+    Returns:
+        bytes: 6 * N bytes.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    xy = np.rint(np.clip(landmarks[:, :2], 0.0, 1.0) * 65535).astype('<u2')
+    z = np.rint(np.clip(landmarks[:, 2], -1.0, 1.0) * 32767).astype('<i2')
+    return xy.tobytes() + z.tobytes()
     
 def load_json_file(json_path):
     """
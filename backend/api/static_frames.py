@@ -0,0 +1,61 @@
+"""
+Skip MediaPipe on frames that haven't changed.
+
+Clients post frames continuously, including while the user holds still
+between signs. Each session remembers a 32x24 thumbnail of the last frame
+MediaPipe actually ran on, plus what it produced; a new frame whose
+thumbnail is within the threshold reuses that result.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+
+# Sum of absolute differences over the 32x24x3 thumbnail (~0.65 per value)
+STATIC_FRAME_THRESHOLD = int(os.environ.get("SIGNWAVE_STATIC_FRAME_THRESHOLD", "1500"))
+# Run MediaPipe again after this many reused frames even if nothing moved,
+# so slow drift can't keep a stale result alive
+STATIC_FRAME_REVALIDATE = int(os.environ.get("SIGNWAVE_STATIC_FRAME_REVALIDATE", "10"))
+THUMBNAIL_SIZE = (32, 24)
+
+
+def frame_thumbnail(frame):
+    return cv2.resize(frame, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+
+class StaticFrameCache:
+    """
+    session_id -> [thumbnail, result, reuse count] for the most recent
+    `max_sessions` sessions.
+    """
+
+    def __init__(self, threshold=STATIC_FRAME_THRESHOLD, revalidate_every=STATIC_FRAME_REVALIDATE, max_sessions=256):
+        self.threshold = threshold
+        self.revalidate_every = revalidate_every
+        self.max_sessions = max_sessions
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, session_id, thumbnail):
+        """The stored result if `thumbnail` matches the session's last frame, else None."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry[2] >= self.revalidate_every:
+                return None
+            # cv2.norm works on the uint8 images directly (no int16 promotion)
+            if cv2.norm(thumbnail, entry[0], cv2.NORM_L1) >= self.threshold:
+                return None
+            entry[2] += 1
+            return entry[1]
+
+    def store(self, session_id, thumbnail, result):
+        with self._lock:
+            self._entries[session_id] = [thumbnail, result, 0]
+            self._entries.move_to_end(session_id)
+            if len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+    def discard(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
@@ -1,3 +1,465 @@
-from django.test import TestCase
+import base64
+import math
+import threading
+from concurrent.futures import Future
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import hand_tracking
+from .batching import BatchedInferenceQueue
+from .frame_buffer import FrameRingBuffer, SessionBufferCache
+from .frame_decoder import (
+    MAX_FRAME_BYTES,
+    FrameDecodeError,
+    FrameTooLargeError,
+    decode_frame,
+    read_frame_bytes,
+)
+from .views import (
+    recognize_asl_letter,
+    recognize_asl_letters,
+    recognize_asl_number,
+    recognize_asl_numbers,
+    recognize_memoized,
+)
+
+# Fingers straight up from the wrist: the rule recognizer reads it as B / 4
+STRAIGHT_HAND = [[0.5, 0.9 - 0.02 * i, 0.0] for i in range(21)]
+
+
+class RecognizeLandmarksTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("recognize_landmarks")
+
+    def post(self, data):
+        return self.client.post(self.url, data, format="json")
+
+    def test_letters(self):
+        response = self.post({"hands": [STRAIGHT_HAND]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"letters": ["B"]})
+
+    def test_numbers(self):
+        response = self.post({"hands": [STRAIGHT_HAND], "mode": "numbers"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"letters": ["4"]})
+
+    def test_single_hand_flat_and_dict_forms(self):
+        flat = [c for lm in STRAIGHT_HAND for c in lm]
+        dicts = [{"x": x, "y": y, "z": z} for x, y, z in STRAIGHT_HAND]
+        self.assertEqual(self.post({"landmarks": flat}).json(), {"letters": ["B"]})
+        self.assertEqual(self.post({"hands": [dicts, STRAIGHT_HAND]}).json(), {"letters": ["B", "B"]})
+
+    def test_target_letters(self):
+        self.assertEqual(self.post({"landmarks": STRAIGHT_HAND, "target_letters": "A"}).json(), {"letters": []})
+        self.assertEqual(self.post({"landmarks": STRAIGHT_HAND, "target_letters": ["b"]}).json(), {"letters": ["B"]})
+
+    def test_bad_requests(self):
+        bad = [
+            [STRAIGHT_HAND],  # body is not an object
+            {},
+            {"hands": []},
+            {"hands": STRAIGHT_HAND[0]},
+            {"landmarks": [1, 2, 3]},
+            {"hands": [STRAIGHT_HAND[:20]]},
+            {"hands": [[{"x": 0.5}] * 21]},
+            {"hands": [[{"x": "a", "y": 0, "z": 0}] * 21]},
+            {"hands": [STRAIGHT_HAND], "mode": "words"},
+            {"hands": [STRAIGHT_HAND], "target_letters": 5},
+            {"hands": [STRAIGHT_HAND], "target_letters": {"A": 1}},
+        ]
+        for data in bad:
+            with self.subTest(data=data):
+                response = self.post(data)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+
+class RecognizeMemoizedTests(TestCase):
+    def test_matches_recognizer_for_any_dtype(self):
+        hand = np.array(STRAIGHT_HAND)
+        expected = [answer for answer in recognize_asl_letters(hand[None]) if answer]
+        for dtype in (np.float32, np.float64):
+            with self.subTest(dtype=dtype):
+                self.assertEqual(recognize_memoized("letters", [hand.astype(dtype)]), expected)
+
+
+def _distance(p1, p2):
+    return math.hypot(p1['x'] - p2['x'], p1['y'] - p2['y'])
+
+
+def _reference_letter(landmarks):
+    """The original if/elif letter ladder, kept as the oracle for the lookup tables."""
+    wrist, middle_mcp = landmarks[0], landmarks[9]
+    angle = -math.pi / 2 - math.atan2(middle_mcp['y'] - wrist['y'], middle_mcp['x'] - wrist['x'])
+    cos_t, sin_t = math.cos(angle), math.sin(angle)
+    lm = []
+    for p in landmarks:
+        x, y = p['x'] - wrist['x'], p['y'] - wrist['y']
+        lm.append({'x': x * cos_t - y * sin_t + wrist['x'], 'y': x * sin_t + y * cos_t + wrist['y']})
+
+    def up(tip, mcp):
+        return lm[tip]['y'] < lm[mcp]['y']
+
+    def curved(tip, pip):
+        return lm[tip]['y'] > lm[pip]['y']
+
+    def sideways(tip, mcp):
+        return abs(lm[tip]['y'] - lm[mcp]['y']) < 0.04 and abs(lm[tip]['x'] - lm[mcp]['x']) > 0.05
+
+    thumb_out = lm[4]['x'] > lm[5]['x'] + 0.06
+    i_up, m_up, r_up, p_up = up(8, 5), up(12, 9), up(16, 13), up(20, 17)
+    curves = [curved(8, 6), curved(12, 10), curved(16, 14), curved(20, 18)]
+    i_side, m_side = sideways(8, 5), sideways(12, 9)
+
+    if i_up and m_up and not r_up and not p_up:
+        return 'V'
+    if i_up and not m_up and not r_up and not p_up and thumb_out:
+        return 'L'
+    if thumb_out and p_up and not i_up and not m_up and not r_up:
+        return 'Y'
+    if i_side and m_side and not r_up and not p_up:
+        return 'H'
+    if i_side and not m_side and not r_up and not p_up:
+        return 'G'
+    if m_up and r_up and p_up and not i_up and _distance(lm[4], lm[8]) < 0.05:
+        return 'F'
+    if i_up and not m_up and not r_up and not p_up and not thumb_out:
+        if abs(lm[4]['y'] - lm[12]['y']) < 0.07 or abs(lm[4]['y'] - lm[16]['y']) < 0.07:
+            return 'D'
+    if p_up and not i_up and not m_up and not r_up:
+        return 'I'
+    if not (i_up or m_up or r_up or p_up or i_side or m_side):
+        return 'A' if thumb_out else 'E'
+    if i_up and m_up and r_up and p_up:
+        if not any(curves) and not thumb_out:
+            return 'B'
+        if sum(curves) >= 3:
+            return 'C'
+    return None
+
+
+def _reference_number(lm):
+    """The original if/elif number ladder."""
+    def up(tip, mcp):
+        return lm[tip]['y'] < lm[mcp]['y'] - 0.05
+
+    i_up, m_up, r_up, p_up = up(8, 5), up(12, 9), up(16, 13), up(20, 17)
+    t_up = lm[4]['y'] < lm[3]['y'] - 0.03
+    touch = [_distance(lm[4], lm[tip]) < 0.06 for tip in (8, 12, 16, 20)]
+
+    if m_up and r_up and p_up and not i_up and touch[0]:
+        return '9'
+    if i_up and r_up and p_up and not m_up and touch[1]:
+        return '8'
+    if i_up and m_up and p_up and not r_up and touch[2]:
+        return '7'
+    if i_up and m_up and r_up and not p_up and touch[3]:
+        return '6'
+    if i_up and m_up and r_up and p_up:
+        return '5' if t_up else '4'
+    if i_up and m_up and t_up and not r_up and not p_up:
+        return '3'
+    if i_up and m_up and not r_up and not p_up:
+        return '2'
+    if i_up and not m_up and not r_up and not p_up:
+        return '1'
+    if not (i_up or m_up or r_up or p_up):
+        return '0'
+    return None
+
+
+class RecognizerEquivalenceTests(SimpleTestCase):
+    """The table-driven recognizers must give the original ladders' answers."""
+
+    def random_hands(self, n, seed=0):
+        rng = np.random.default_rng(seed)
+        base = rng.uniform(0.3, 0.7, (n, 1, 3))
+        spread = rng.choice([0.02, 0.05, 0.1], (n, 1, 1))
+        return (base + rng.normal(0, 1, (n, 21, 3)) * spread).astype(np.float32)
+
+    def test_matches_reference_ladders(self):
+        hands = self.random_hands(3000)
+        letters = recognize_asl_letters(hands)
+        numbers = recognize_asl_numbers(hands)
+        seen = set()
+        for i, hand in enumerate(hands):
+            dicts = [{'x': float(x), 'y': float(y), 'z': float(z)} for x, y, z in hand]
+            letter, number = _reference_letter(dicts), _reference_number(dicts)
+            seen.update((letter, number))
+            with self.subTest(hand=i):
+                self.assertEqual(letters[i], letter)
+                self.assertEqual(recognize_asl_letter(hand), letter)
+                self.assertEqual(recognize_asl_letter(dicts), letter)
+                self.assertEqual(numbers[i], number)
+                self.assertEqual(recognize_asl_number(hand), number)
+                self.assertEqual(recognize_asl_number(dicts), number)
+        # The random poses should reach more than a couple of branches
+        self.assertGreater(len(seen), 6)
+
+    def test_targets_mask_other_answers(self):
+        hands = self.random_hands(500, seed=1)
+        targets = frozenset("BE")
+        for full, restricted in zip(recognize_asl_letters(hands), recognize_asl_letters(hands, targets)):
+            self.assertEqual(restricted, full if full in targets else None)
+
+    def test_wrong_landmark_count(self):
+        self.assertIsNone(recognize_asl_letter(np.zeros((20, 3))))
+        self.assertIsNone(recognize_asl_number([]))
+
+
+class FrameDecoderTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def binary_request(self, body, content_type="image/jpeg", **headers):
+        return Request(self.factory.post("/api/track-hands/", body, content_type=content_type, **headers))
+
+    def json_request(self, data):
+        return Request(self.factory.post("/api/track-hands/", data, format="json"), parsers=[JSONParser()])
+
+    def test_rejects_unknown_signature(self):
+        for request in (
+            self.binary_request(b"GIF89a" + b"\0" * 32),
+            self.json_request({"image": base64.b64encode(b"GIF89a").decode()}),
+        ):
+            with self.assertRaises(FrameDecodeError) as ctx:
+                read_frame_bytes(request)
+            self.assertEqual(ctx.exception.status, 400)
+
+    def test_rejects_oversized_frames(self):
+        body = b"\xff\xd8\xff" + b"\0" * MAX_FRAME_BYTES
+        for request in (
+            self.binary_request(body),
+            self.json_request({"image": "data:image/jpeg;base64," + base64.b64encode(body).decode()}),
+        ):
+            with self.assertRaises(FrameTooLargeError) as ctx:
+                read_frame_bytes(request)
+            self.assertEqual(ctx.exception.status, 413)
+
+    def test_rejects_invalid_base64(self):
+        with self.assertRaises(FrameDecodeError):
+            read_frame_bytes(self.json_request({"image": "not base64!"}))
+
+    def test_raw_rgb_frame(self):
+        body = bytes(range(2 * 3 * 3))
+        frame = decode_frame(self.binary_request(body, "application/octet-stream", HTTP_X_FRAME_SHAPE="2x3"))
+        self.assertEqual(frame.shape, (2, 3, 3))
+        self.assertFalse(frame.flags.writeable)
+
+    def test_rejects_bad_frame_shape(self):
+        cases = [("480", 400), ("axb", 400), ("0x640", 400), ("2x3", 400), ("2000x2000", 413)]
+        for shape, status in cases:
+            with self.subTest(shape=shape):
+                request = self.binary_request(b"\0" * 12, "application/octet-stream", HTTP_X_FRAME_SHAPE=shape)
+                with self.assertRaises(FrameDecodeError) as ctx:
+                    decode_frame(request)
+                self.assertEqual(ctx.exception.status, status)
+
+
+class FrameRingBufferTests(SimpleTestCase):
+    def test_window_before_full(self):
+        ring = FrameRingBuffer(4, (2,))
+        for i in range(3):
+            ring.push([i, i])
+        self.assertEqual(len(ring), 3)
+        self.assertFalse(ring.full)
+        np.testing.assert_array_equal(ring.window()[:, 0], [0, 1, 2])
+
+    def test_wraparound_keeps_newest_in_order(self):
+        ring = FrameRingBuffer(4, (2,))
+        for i in range(11):
+            ring.push([i, -i])
+            expected = list(range(max(0, i - 3), i + 1))
+            np.testing.assert_array_equal(ring.window()[:, 0], expected)
+            np.testing.assert_array_equal(ring.window()[:, 1], [-v for v in expected])
+        self.assertTrue(ring.full)
+        # A wrapped window is copied into the same scratch array every time
+        self.assertIs(ring.window(), ring.window())
+
+    def test_clear(self):
+        ring = FrameRingBuffer(3, (1,))
+        for i in range(5):
+            ring.push([i])
+        ring.clear()
+        self.assertEqual(len(ring), 0)
+        ring.push([7])
+        np.testing.assert_array_equal(ring.window(), [[7]])
+
+
+class SessionBufferCacheTests(SimpleTestCase):
+    def test_same_session_same_buffer(self):
+        cache = SessionBufferCache(4, (2,))
+        self.assertIs(cache.get("a"), cache.get("a"))
+        self.assertIsNot(cache.get("a"), cache.get("b"))
+
+    def test_evicts_least_recently_used(self):
+        cache = SessionBufferCache(4, (2,), maxsize=2)
+        a = cache.get("a")
+        cache.get("b")
+        self.assertIs(cache.get("a"), a)  # "b" is now the oldest
+        cache.get("c")
+        self.assertEqual(len(cache), 2)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+
+    def test_drops_idle_sessions(self):
+        cache = SessionBufferCache(4, (2,), ttl=10)
+        with mock.patch("api.frame_buffer.time.monotonic", return_value=100.0):
+            cache.get("idle")
+        with mock.patch("api.frame_buffer.time.monotonic", return_value=105.0):
+            cache.get("active")
+        with mock.patch("api.frame_buffer.time.monotonic", return_value=112.0):
+            cache.get("active")
+        self.assertNotIn("idle", cache)
+        self.assertIn("active", cache)
+
+    def test_pop(self):
+        cache = SessionBufferCache(4, (2,))
+        buffer = cache.get("a")
+        self.assertIs(cache.pop("a"), buffer)
+        self.assertIsNone(cache.pop("a"))
+
+
+class BatchedInferenceQueueTests(SimpleTestCase):
+    def test_rows_go_back_to_their_callers(self):
+        batch_shapes = []
+
+        def infer(batch):
+            batch_shapes.append(batch.shape)
+            return batch * 2
+
+        batcher = BatchedInferenceQueue(infer, max_batch_size=4, batch_timeout_micros=50000, batch_sizes=(2, 4))
+        futures = [batcher.submit(np.full(3, i)) for i in range(7)]
+        for i, future in enumerate(futures):
+            np.testing.assert_array_equal(future.result(timeout=5), np.full(3, 2 * i))
+        # Batches are padded up to an allowed size, never beyond it
+        self.assertTrue(all(shape[0] in (2, 4) and shape[1:] == (3,) for shape in batch_shapes))
+
+    def test_failure_reaches_every_caller_and_worker_survives(self):
+        fail = threading.Event()
+        fail.set()
+
+        def infer(batch):
+            if fail.is_set():
+                raise RuntimeError("boom")
+            return batch
+
+        batcher = BatchedInferenceQueue(infer, max_batch_size=4, batch_timeout_micros=50000)
+        futures = [batcher.submit(np.zeros(2)) for _ in range(3)]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+        fail.clear()
+        np.testing.assert_array_equal(batcher.predict(np.ones(2), timeout=5), np.ones(2))
+
+    def test_wrong_number_of_outputs(self):
+        batcher = BatchedInferenceQueue(lambda batch: batch[1:], max_batch_size=4, batch_timeout_micros=50000)
+        futures = [batcher.submit(np.zeros(2)) for _ in range(2)]
+        for future in futures:
+            with self.assertRaises(ValueError):
+                future.result(timeout=5)
+
+    def test_submit_copies_the_sample(self):
+        # A ring-buffer window is a live view; a later push() must not reach the model
+        started, release = threading.Event(), threading.Event()
+
+        def infer(batch):
+            started.set()
+            release.wait(5)
+            return batch.copy()
+
+        ring = FrameRingBuffer(4, (2,))
+        for i in range(4):
+            ring.push([i, i])
+        batcher = BatchedInferenceQueue(infer, max_batch_size=1)
+        batcher.submit(np.zeros((4, 2)))  # keeps the worker busy
+        self.assertTrue(started.wait(5))
+        future = batcher.submit(ring.window())
+        ring.push([99, 99])
+        release.set()
+        np.testing.assert_array_equal(future.result(timeout=5), [[0, 0], [1, 1], [2, 2], [3, 3]])
+
+    def test_no_timeout_still_batches_queued_samples(self):
+        started, release = threading.Event(), threading.Event()
+        batch_sizes = []
+
+        def infer(batch):
+            batch_sizes.append(len(batch))
+            started.set()
+            release.wait(5)
+            return batch
+
+        batcher = BatchedInferenceQueue(infer, max_batch_size=4, batch_timeout_micros=0)
+        batcher.submit(np.zeros(2))  # keeps the worker busy
+        self.assertTrue(started.wait(5))
+        futures = [batcher.submit(np.full(2, i)) for i in range(3)]
+        release.set()
+        for i, future in enumerate(futures):
+            np.testing.assert_array_equal(future.result(timeout=5), np.full(2, i))
+        self.assertEqual(batch_sizes, [1, 3])
+
+    def test_warm_up_runs_each_batch_size(self):
+        sizes = []
+        batcher = BatchedInferenceQueue(lambda batch: sizes.append(len(batch)) or batch, batch_sizes=(1, 4, 16))
+        batcher.warm_up((3,))
+        self.assertEqual(sizes, [1, 4, 16])
+
+
+class _FakeHands:
+    """Stands in for a Hands graph; like the real one it fails once closed."""
+
+    def __init__(self, video=True):
+        self.graph = object()
+
+    def process(self, rgb_frame):
+        if self.graph is None:
+            raise AttributeError("'NoneType' object has no attribute 'add_packet_to_input_stream'")
+        return SimpleNamespace(multi_hand_landmarks=None, graph=self.graph)
+
+    def close(self):
+        self.graph = None
+
+
+@mock.patch.object(hand_tracking, "_new_hands", _FakeHands)
+@mock.patch.object(hand_tracking, "MAX_SESSION_HANDS", 1)
+class SessionHandsEvictionTests(SimpleTestCase):
+    def setUp(self):
+        hand_tracking._session_hands.clear()
+
+    def tearDown(self):
+        hand_tracking._session_hands.clear()
+        hand_tracking._pending.clear()
+
+    def test_closed_graph_returns_none(self):
+        entry = hand_tracking._hands_for_session("a")
+        hand_tracking._hands_for_session("b")  # evicts and closes "a"
+        self.assertIsNone(entry.process(np.zeros((4, 4, 3), dtype=np.uint8)))
+
+    def test_pending_frame_survives_eviction(self):
+        # The worker looks up session "a"'s graph, then "b" evicts it before process() runs
+        real_lookup = hand_tracking._hands_for_session
+        stale = real_lookup("a")
+
+        def lookup(session_id):
+            if session_id == "a" and stale.hands is not None:
+                real_lookup("b")
+                return stale
+            return real_lookup(session_id)
+
+        future = Future()
+        hand_tracking._pending["a"] = (np.zeros((4, 4, 3), dtype=np.uint8), future)
+        with mock.patch.object(hand_tracking, "_hands_for_session", lookup):
+            hand_tracking._process_pending("a")
+        results = future.result(timeout=1)
+        self.assertIsNotNone(results)
+        self.assertIsNotNone(results.graph)
+        self.assertIsNone(stale.hands)
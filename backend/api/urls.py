@@ -8,6 +8,7 @@ from .views import (
     get_available_signs,
     check_model_status,
     track_asl_numbers,
+    recognize_landmarks,
     test_siglip_model,
     get_reference_sign,
     record_reference_sign
@@ -17,6 +18,7 @@ urlpatterns = [
     path("register/", register_api, name="register_api"),
     path("track-hands/", track_hands, name="track_hands"),
     path("track-numbers/", track_asl_numbers, name="track_numbers"),
+    path("recognize-landmarks/", recognize_landmarks, name="recognize_landmarks"),
     path("login/", login_api, name="login_api"),
     path("progress/", progress_api, name="progress_api"),
     path("track-video/", track_video_sequence, name="track_video"),
@@ -26,3 +28,6 @@ urlpatterns = [
     path("reference-sign/<str:sign_name>/", get_reference_sign, name="get_reference_sign"),
     path("record-reference-sign/", record_reference_sign, name="record_reference_sign"),
 ]
+
+# Each route gets its own name; a copy-pasted duplicate would make reverse() ambiguous
+assert len(urlpatterns) == len({p.name for p in urlpatterns}), "duplicate URL names in api/urls.py"
@@ -1,34 +1,68 @@
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
+from django.http import HttpResponse
+from django.views.decorators.cache import never_cache
+import base64
 import json
+import logging
+import orjson
 
 # Hand tracking imports
-import cv2
-import mediapipe as mp
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-import base64
 import numpy as np
 import math
-import tensorflow as tf
+import threading
+from functools import lru_cache
+
+from .renderers import ORJSONResponse
+
+logger = logging.getLogger(__name__)
 
-# Import the pre-trained model
+# The pre-trained model is only read by the model-status endpoints below, so
+# it's built on first use instead of while every worker imports this module
 from .asl_pretrained_model import ASLPretrainedModel
 
+_asl_model_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _load_asl_model():
+    return ASLPretrainedModel()
+
+def get_asl_model():
+    # lru_cache does not stop two threads from both running the loader
+    with _asl_model_lock:
+        return _load_asl_model()
+
 from .islr_loader import (
-    islr_model,
+    get_islr_model,
+    predict_islr,
     idx_to_sign,
-    holistic,
     get_holistic_for_session,
+    release_holistic_for_session,
     sequence_buffers,
     SEQ_LEN,
     THRESH_HOLD,
 )
 
-from .src.landmarks_extraction import extract_coordinates
+from .frame_decoder import (
+    HOLISTIC_MAX_SIDE,
+    FrameDecodeError,
+    decode_frame,
+    downscale_frame,
+    frame_request_params,
+    request_flag,
+)
+from .src.landmarks_extraction import (
+    extract_coordinates,
+    hand_landmarks_to_array,
+    landmarks_to_dicts,
+    quantize_landmarks,
+)
 
 # Import SigLIP model for alphabet detection
 try:
@@ -50,11 +84,9 @@ try:
         confidence_threshold=0.2  # Minimum confidence threshold
     )
     SIGLIP_AVAILABLE = True
-    print("[OK] Improved SigLIP model loaded successfully")
-except Exception as e:
-    import traceback
-    print(f"[WARNING] SigLIP model not available: {e}")
-    print(traceback.format_exc())
+    logger.info("Improved SigLIP model loaded successfully")
+except Exception:
+    logger.warning("SigLIP model not available", exc_info=True)
     SIGLIP_AVAILABLE = False
     siglip_model = None
     siglip_processor = None
@@ -66,84 +98,114 @@ try:
 except ImportError:
     HAS_PROGRESS = False
 
-# Initialize MediaPipe
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(static_image_mode=False, max_num_hands=2, min_detection_confidence=0.5)
+# MediaPipe Hands runs on a pool of worker threads, one instance each
+from .hand_tracking import track_frame
+from .static_frames import StaticFrameCache, frame_thumbnail
+
+# Landmarks of the last frame Holistic ran on, per track_video_sequence session
+video_static_frames = StaticFrameCache()
 
+# Numba-compiled feature masks when numba is installed (NumPy versions below otherwise)
+from . import recognizer_njit
 
-# Buffer to store sequences for video recognition
-sequence_buffers = {}
+# Most frames at 30 fps have no hand (or were superseded), so those bodies are
+# serialized once here instead of going through the renderer every time
+_NO_HANDS = {"hands": [], "letters": []}
+_SKIPPED = {"hands": [], "letters": [], "skipped": True}
+_NO_HANDS_JSON = orjson.dumps(_NO_HANDS)
+_SKIPPED_JSON = orjson.dumps(_SKIPPED)
 
-def get_distance(p1, p2):
-    """Calculate 2D Euclidean distance between two landmark points"""
-    return math.hypot(p1['x'] - p2['x'], p1['y'] - p2['y'])
+
+def encode_hand(landmarks, encoding=None):
+    """
+    One entry of the "hands" list: x/y/z dicts by default, or with
+    landmark_encoding=q16 a base64 string of quantize_landmarks() (126 bytes).
+    """
+    if encoding == "q16":
+        return base64.b64encode(quantize_landmarks(landmarks)).decode("ascii")
+    return landmarks_to_dicts(landmarks)
+
+
+def _constant_response(request, data, body):
+    """`body` is orjson.dumps(data); other negotiated formats render `data` normally."""
+    if request.accepted_renderer.format != "json":
+        return Response(data)
+    return HttpResponse(body, content_type="application/json")
+
+
+def as_hand_array(landmarks):
+    """
+    (21, 3) float64 array from either a landmark array or the legacy list of
+    {'x', 'y', 'z'} dicts; None if there aren't exactly 21 landmarks.
+    """
+    if landmarks is None or len(landmarks) != 21:
+        return None
+    if isinstance(landmarks, np.ndarray):
+        return landmarks.astype(np.float64, copy=False)
+    return np.array([(lm['x'], lm['y'], lm['z']) for lm in landmarks], dtype=np.float64)
 
 def normalize_hand_rotation(landmarks):
     """
-    Rotates all landmarks so the palm is "upright" (wrist-to-MCP vector points up).
+    Rotates all hand landmarks so the hand is "upright".
+    It pivots around the wrist (0) and aligns the vector from
+    the wrist (0) to the middle finger MCP (9) to point straight "up".
     This makes logic for horizontal signs (G, H) possible.
+    Takes and returns a (21, 3) array.
     """
-    wrist = landmarks[0]
-    middle_mcp = landmarks[9]
+    return normalize_hand_rotations(landmarks[np.newaxis])[0]
+
+def normalize_hand_rotations(hands):
+    """normalize_hand_rotation for an (N, 21, 3) stack of hands at once."""
+    wrist = hands[:, 0]
+    middle_mcp = hands[:, 9]
 
     # 1. Calculate the palm vector
-    palm_vec_x = middle_mcp['x'] - wrist['x']
-    palm_vec_y = middle_mcp['y'] - wrist['y']
-    
-    # 2. Calculate the angle of this vector
-    # We want to rotate it to match the "up" vector (0, -1)
-    current_angle = math.atan2(palm_vec_y, palm_vec_x)
+    palm_vec = middle_mcp[:, :2] - wrist[:, :2]
+
+    # 2. Angle needed to rotate it onto the "up" vector (0, -1); scalar libm
+    #    per hand (N is 1-2) so results match the compiled kernel exactly
     target_angle = -math.pi / 2  # Angle for (0, -1)
-    
-    rotation_angle = target_angle - current_angle
-    cos_theta = math.cos(rotation_angle)
-    sin_theta = math.sin(rotation_angle)
-    
-    # 3. Apply the rotation to all landmarks, pivoting around the wrist
-    origin_x, origin_y = wrist['x'], wrist['y']
-    rotated_landmarks = []
-    
-    for lm in landmarks:
-        # Translate point to origin
-        translated_x = lm['x'] - origin_x
-        translated_y = lm['y'] - origin_y
-        
-        # Rotate point
-        rotated_x = translated_x * cos_theta - translated_y * sin_theta
-        rotated_y = translated_x * sin_theta + translated_y * cos_theta
-        
-        # Translate point back
-        new_x = rotated_x + origin_x
-        new_y = rotated_y + origin_y
-        
-        rotated_landmarks.append({'x': new_x, 'y': new_y, 'z': lm['z']})
-        
-    return rotated_landmarks
+    rotation_angles = [target_angle - math.atan2(vy, vx) for vx, vy in palm_vec.tolist()]
+    cos_theta = np.array([math.cos(a) for a in rotation_angles])[:, np.newaxis]
+    sin_theta = np.array([math.sin(a) for a in rotation_angles])[:, np.newaxis]
+
+    # 3. Apply the rotation to all landmarks at once, pivoting around the wrist
+    origin_x, origin_y = wrist[:, 0:1], wrist[:, 1:2]
+    translated_x = hands[:, :, 0] - origin_x
+    translated_y = hands[:, :, 1] - origin_y
+
+    rotated = hands.copy()
+    rotated[:, :, 0] = (translated_x * cos_theta - translated_y * sin_theta) + origin_x
+    rotated[:, :, 1] = (translated_x * sin_theta + translated_y * cos_theta) + origin_y
+    return rotated
 
 # ---------- Authentication APIs ----------
 
 @csrf_exempt
 def register_api(request):
     if request.method != "POST":
-        return JsonResponse({"detail": "Method not allowed"}, status=405)
+        return ORJSONResponse({"detail": "Method not allowed"}, status=405)
 
     try:
-        data = json.loads(request.body.decode("utf-8"))
-    except json.JSONDecodeError:
-        return JsonResponse({"detail": "Invalid JSON"}, status=400)
+        data = orjson.loads(request.body)
+    except orjson.JSONDecodeError:
+        return ORJSONResponse({"detail": "Invalid JSON"}, status=400)
 
     username = data.get("username")
     email = data.get("email")
     password = data.get("password")
 
     if not username or not email or not password:
-        return JsonResponse({"detail": "Missing fields"}, status=400)
+        return ORJSONResponse({"detail": "Missing fields"}, status=400)
 
-    if User.objects.filter(username=username).exists():
-        return JsonResponse({"detail": "Username already taken"}, status=400)
-
-    user = User.objects.create_user(username=username, email=email, password=password)
-    return JsonResponse(
+    # One INSERT; the username UNIQUE constraint catches duplicates (and the
+    # race between two signups that an exists() pre-check would miss)
+    try:
+        with transaction.atomic():
+            user = User.objects.create_user(username=username, email=email, password=password)
+    except IntegrityError:
+        return ORJSONResponse({"detail": "Username already taken"}, status=400)
+    return ORJSONResponse(
         {"id": user.id, "username": user.username, "email": user.email},
         status=201,
     )
@@ -152,416 +214,448 @@ def register_api(request):
 @csrf_exempt
 def login_api(request):
     if request.method != "POST":
-        return JsonResponse({"detail": "Method not allowed"}, status=405)
+        return ORJSONResponse({"detail": "Method not allowed"}, status=405)
 
     try:
-        data = json.loads(request.body.decode("utf-8"))
-    except json.JSONDecodeError:
-        return JsonResponse({"detail": "Invalid JSON"}, status=400)
+        data = orjson.loads(request.body)
+    except orjson.JSONDecodeError:
+        return ORJSONResponse({"detail": "Invalid JSON"}, status=400)
 
     username = data.get("username")
     password = data.get("password")
 
     if not username or not password:
-        return JsonResponse({"detail": "Missing credentials"}, status=400)
+        return ORJSONResponse({"detail": "Missing credentials"}, status=400)
 
     user = authenticate(request, username=username, password=password)
     if user is None:
-        return JsonResponse({"detail": "Invalid username or password"}, status=400)
+        return ORJSONResponse({"detail": "Invalid username or password"}, status=400)
 
     # create session cookie
     login(request, user)
-    return JsonResponse({"detail": "Logged in", "username": user.username})
+    return ORJSONResponse({"detail": "Logged in", "username": user.username})
 
 
 # ---------- ASL Recognition Functions ----------
+#
+# Both recognizers reduce a hand to a handful of boolean features, pack them
+# into an integer mask, and look the answer up in a table. The tables are
+# built once at import by running the original if/elif rule ladders over
+# every possible mask, so the lookup gives exactly the same answers as the
+# ladders (including their ordering) without branching per frame.
 
-def recognize_asl_letter(landmarks):
-    """
-    Improved ASL letter recognition with rotation normalization.
-    Recognizes: A, B, C, D, E, F, G, H, I, L, V, Y
-    """
-    if not landmarks or len(landmarks) != 21:
-        print(f"❌ Invalid landmarks: got {len(landmarks) if landmarks else 0} landmarks")
-        return None
-    
-    # --- NEW: NORMALIZE HAND ROTATION ---
-    try:
-        rotated_landmarks = normalize_hand_rotation(landmarks)
-    except Exception as e:
-        print(f"Error during rotation: {e}")
-        rotated_landmarks = landmarks # Fallback if rotation fails
-    # ---
-
-    # Get key landmark positions from the *rotated* list
-    thumb_tip = rotated_landmarks[4]
-    index_tip = rotated_landmarks[8]
-    middle_tip = rotated_landmarks[12]
-    ring_tip = rotated_landmarks[16]
-    pinky_tip = rotated_landmarks[20]
-    
-    index_mcp = rotated_landmarks[5]
-    middle_mcp = rotated_landmarks[9]
-    ring_mcp = rotated_landmarks[13]
-    pinky_mcp = rotated_landmarks[17]
-
-    index_pip = rotated_landmarks[6]
-    middle_pip = rotated_landmarks[10]
-    ring_pip = rotated_landmarks[14]
-    pinky_pip = rotated_landmarks[18]
-    
-    # --- HELPERS (now use rotated landmarks) ---
-    
-    def is_finger_up(tip, mcp):
-        # Y-axis is inverted, so "up" is a smaller Y value
-        return tip['y'] < mcp['y']
-
-    def is_finger_curved(tip, pip):
-        # Tip is "lower" (higher Y) than the middle knuckle
-        return tip['y'] > pip['y']
-
-    # --- NEW HELPER: For G and H ---
-    def is_finger_sideways(tip, mcp):
-        # Checks if finger is pointing horizontally
-        # After normalization, Ys should be "level", Xs should be "apart"
-        is_level = abs(tip['y'] - mcp['y']) < 0.04 # 0.04 is a threshold
-        is_out = abs(tip['x'] - mcp['x']) > 0.05 
-        return is_level and is_out
-    
-    # Check "up" states
-    thumb_extended_sideways = thumb_tip['x'] > index_mcp['x'] + 0.06
-    index_up = is_finger_up(index_tip, index_mcp)
-    middle_up = is_finger_up(middle_tip, middle_mcp)
-    ring_up = is_finger_up(ring_tip, ring_mcp)
-    pinky_up = is_finger_up(pinky_tip, pinky_mcp)
-    
-    # Check "curve" states
-    index_curved = is_finger_curved(index_tip, index_pip)
-    middle_curved = is_finger_curved(middle_tip, middle_pip)
-    ring_curved = is_finger_curved(ring_tip, ring_pip)
-    pinky_curved = is_finger_curved(pinky_tip, pinky_pip)
-    
-    # --- NEW: Check "sideways" states ---
-    index_sideways = is_finger_sideways(index_tip, index_mcp)
-    middle_sideways = is_finger_sideways(middle_tip, middle_mcp)
+# Landmark indices for the index, middle, ring and pinky fingers
+FINGER_TIPS = np.array([8, 12, 16, 20])
+FINGER_MCPS = np.array([5, 9, 13, 17])
+FINGER_PIPS = np.array([6, 10, 14, 18])
 
-    # Debug output
-    print(f"🖐️ Up - T:{thumb_extended_sideways} I:{index_up} M:{middle_up} R:{ring_up} P:{pinky_up}")
-    print(f"    Side - I:{index_sideways} M:{middle_sideways}")
-    
-    # --- Letter recognition logic (Order is CRITICAL) ---
+# Letter mask bits: 0-3 finger up (I, M, R, P), 4-7 finger curved,
+# 8-9 index/middle sideways, 10 thumb out sideways, 11 thumb touching index,
+# 12 thumb level with the middle or ring tip
+LETTER_FEATURE_BITS = 13
+_LETTER_BIT_WEIGHTS = 1 << np.arange(LETTER_FEATURE_BITS)
+
+# Number mask bits: 0-3 finger up (I, M, R, P), 4 thumb up,
+# 5-8 thumb touching the index/middle/ring/pinky tip
+NUMBER_FEATURE_BITS = 9
+_NUMBER_BIT_WEIGHTS = 1 << np.arange(NUMBER_FEATURE_BITS)
+
+
+def _unpack_mask(mask, n_bits):
+    return [bool(mask >> bit & 1) for bit in range(n_bits)]
+
+
+def _letter_from_features(bits):
+    """The letter rule ladder on decoded feature bits (order is CRITICAL)."""
+    index_up, middle_up, ring_up, pinky_up = bits[0:4]
+    index_curved, middle_curved, ring_curved, pinky_curved = bits[4:8]
+    index_sideways, middle_sideways, thumb_extended_sideways, thumb_touches_index, thumb_near_tips = bits[8:13]
 
     # V: index and middle up
     if index_up and middle_up and not ring_up and not pinky_up:
-        print("✅ Recognized: V")
         return 'V'
-    
     # L: index up, thumb out
     if index_up and not middle_up and not ring_up and not pinky_up and thumb_extended_sideways:
-        print("✅ Recognized: L")
         return 'L'
-    
     # Y: thumb and pinky up
     if thumb_extended_sideways and pinky_up and not index_up and not middle_up and not ring_up:
-        print("✅ Recognized: Y")
         return 'Y'
-
-    # --- NEW: G and H (horizontal signs) ---
-    # Must check before "closed fist" logic
-
-    # H: Index and Middle sideways
+    # H: Index and Middle sideways (horizontal signs come before the fist)
     if index_sideways and middle_sideways and not ring_up and not pinky_up:
-        print("✅ Recognized: H")
         return 'H'
-        
     # G: Index sideways
     if index_sideways and not middle_sideways and not ring_up and not pinky_up:
-        print("✅ Recognized: G")
         return 'G'
-    # ---
-
     # F: Middle, Ring, Pinky up. Index and Thumb touching.
-    thumb_to_index_dist = get_distance(thumb_tip, index_tip)
-    if (middle_up and ring_up and pinky_up) and \
-       (not index_up) and \
-       (thumb_to_index_dist < 0.05): 
-        print("✅ Recognized: F")
+    if middle_up and ring_up and pinky_up and not index_up and thumb_touches_index:
         return 'F'
-
     # D: Index up, others closed in a circle
-    if index_up and not middle_up and not ring_up and not pinky_up and not thumb_extended_sideways:
-        thumb_near_middle_y = abs(thumb_tip['y'] - middle_tip['y']) < 0.07
-        thumb_near_ring_y = abs(thumb_tip['y'] - ring_tip['y']) < 0.07
-        if thumb_near_middle_y or thumb_near_ring_y:
-            print("✅ Recognized: D")
-            return 'D'
-
+    if index_up and not middle_up and not ring_up and not pinky_up and not thumb_extended_sideways and thumb_near_tips:
+        return 'D'
     # I: only pinky up
     if pinky_up and not index_up and not middle_up and not ring_up:
-        print("✅ Recognized: I")
         return 'I'
-    
     # 'A' and 'E' logic (fist)
-    all_fingers_closed = not index_up and not middle_up and not ring_up and not pinky_up \
-                         and not index_sideways and not middle_sideways # G/H check
-    
-    if all_fingers_closed:
-        if thumb_extended_sideways:
-            print("✅ Recognized: A")
-            return 'A'
-        else:
-            print("✅ Recognized: E")
-            return 'E'
-    
+    if not index_up and not middle_up and not ring_up and not pinky_up \
+            and not index_sideways and not middle_sideways:
+        return 'A' if thumb_extended_sideways else 'E'
     # 'B' and 'C' logic (all fingers up)
-    all_fingers_up = index_up and middle_up and ring_up and pinky_up
-    
-    if all_fingers_up:
+    if index_up and middle_up and ring_up and pinky_up:
         all_fingers_straight = not index_curved and not middle_curved and not ring_curved and not pinky_curved
         if all_fingers_straight and not thumb_extended_sideways:
-            print("✅ Recognized: B")
             return 'B'
-
-        curved_count = sum([index_curved, middle_curved, ring_curved, pinky_curved])
-        if curved_count >= 3:
-            print("✅ Recognized: C")
+        if index_curved + middle_curved + ring_curved + pinky_curved >= 3:
             return 'C'
-    
-    print(f"❌ No letter match")
     return None
 
-def recognize_asl_number(landmarks):
-    """
-    Recognizes ASL numbers 0-9.
-    This logic assumes a vertical hand orientation.
-    """
-    if not landmarks or len(landmarks) != 21:
-        print(f"❌ Invalid landmarks for number")
-        return None
 
-    # Get key landmark positions
-    thumb_tip = landmarks[4]
-    index_tip = landmarks[8]
-    middle_tip = landmarks[12]
-    ring_tip = landmarks[16]
-    pinky_tip = landmarks[20]
-    
-    thumb_ip = landmarks[3] # Thumb knuckle
-    index_mcp = landmarks[5]
-    middle_mcp = landmarks[9]
-    ring_mcp = landmarks[13]
-    pinky_mcp = landmarks[17]
-
-    # --- Helpers ---
-    def is_finger_up(tip, mcp):
-        # Using the same "vertical up" logic
-        return tip['y'] < mcp['y'] - 0.05 
-
-    def is_thumb_up(tip, ip_knuckle):
-        # --- MODIFIED: Thumb must be *significantly* higher than its knuckle ---
-        return tip['y'] < ip_knuckle['y'] - 0.03
-    
-    # --- Get Finger States ---
-    index_up = is_finger_up(index_tip, index_mcp)
-    middle_up = is_finger_up(middle_tip, middle_mcp)
-    ring_up = is_finger_up(ring_tip, ring_mcp)
-    pinky_up = is_finger_up(pinky_tip, pinky_mcp)
-    thumb_up = is_thumb_up(thumb_tip, thumb_ip)
-    
-    print(f"    DEBUG (Num): I_up={index_up}, M_up={middle_up}, R_up={ring_up}, P_up={pinky_up}, T_up={thumb_up}")
-    
-    # --- Get Distances for 6, 7, 8, 9 ---
-    TOUCH_THRESHOLD = 0.06
-    thumb_to_index_dist = get_distance(thumb_tip, index_tip)
-    thumb_to_middle_dist = get_distance(thumb_tip, middle_tip)
-    thumb_to_ring_dist = get_distance(thumb_tip, ring_tip)
-    thumb_to_pinky_dist = get_distance(thumb_tip, pinky_tip)
-
-    # --- Number Logic (Order is Critical!) ---
-    
+def _number_from_features(bits):
+    """The number rule ladder on decoded feature bits (order is Critical!)."""
+    index_up, middle_up, ring_up, pinky_up, thumb_up = bits[0:5]
+    touch_index, touch_middle, touch_ring, touch_pinky = bits[5:9]
+
     # 9: Index finger touches thumb. Middle, Ring, Pinky are UP.
-    if (middle_up and ring_up and pinky_up) and (not index_up) and (thumb_to_index_dist < TOUCH_THRESHOLD):
-        print("✅ Recognized: 9")
+    if middle_up and ring_up and pinky_up and not index_up and touch_index:
         return '9'
-        
     # 8: Middle finger touches thumb. Index, Ring, Pinky are UP.
-    if (index_up and ring_up and pinky_up) and (not middle_up) and (thumb_to_middle_dist < TOUCH_THRESHOLD):
-        print("✅ Recognized: 8")
+    if index_up and ring_up and pinky_up and not middle_up and touch_middle:
         return '8'
-
     # 7: Ring finger touches thumb. Index, Middle, Pinky are UP.
-    if (index_up and middle_up and pinky_up) and (not ring_up) and (thumb_to_ring_dist < TOUCH_THRESHOLD):
-        print(f"    DEBUG (7?): RingDist={thumb_to_ring_dist:.4f} (Threshold={TOUCH_THRESHOLD})")
-        print("✅ Recognized: 7")
+    if index_up and middle_up and pinky_up and not ring_up and touch_ring:
         return '7'
-
     # 6: Pinky finger touches thumb. Index, Middle, Ring are UP.
-    if (index_up and middle_up and ring_up) and (not pinky_up) and (thumb_to_pinky_dist < TOUCH_THRESHOLD):
-        print("✅ Recognized: 6")
+    if index_up and middle_up and ring_up and not pinky_up and touch_pinky:
         return '6'
-    
-    # ---
-
     # 5: All 5 fingers up
     if index_up and middle_up and ring_up and pinky_up and thumb_up:
-        print("✅ Recognized: 5")
         return '5'
-        
     # 4: 4 fingers up (no thumb)
-    # This will now trigger correctly because thumb_up will be False
     if index_up and middle_up and ring_up and pinky_up:
-        print("✅ Recognized: 4")
         return '4'
-        
     # 3: Index, Middle, and Thumb up
     if index_up and middle_up and thumb_up and not ring_up and not pinky_up:
-        print("✅ Recognized: 3")
         return '3'
-
     # 2: Index and Middle up (like 'V')
-    # This will now trigger correctly because thumb_up will be False
     if index_up and middle_up and not ring_up and not pinky_up:
-        print("✅ Recognized: 2")
         return '2'
-        
     # 1: Index up (like 'D')
     if index_up and not middle_up and not ring_up and not pinky_up:
-        print("✅ Recognized: 1")
         return '1'
-        
     # 0: Closed fist (like 'A'/'E')
-    all_fingers_down = not index_up and not middle_up and not ring_up and not pinky_up
-    if all_fingers_down:
-        print("✅ Recognized: 0")
+    if not index_up and not middle_up and not ring_up and not pinky_up:
         return '0'
-        
-    print(f"❌ No number match")
     return None
 
-# --- NEW API ENDPOINT ---
-@api_view(["POST"])
-def track_asl_numbers(request):
+
+LETTER_TABLE = [_letter_from_features(_unpack_mask(m, LETTER_FEATURE_BITS)) for m in range(1 << LETTER_FEATURE_BITS)]
+NUMBER_TABLE = [_number_from_features(_unpack_mask(m, NUMBER_FEATURE_BITS)) for m in range(1 << NUMBER_FEATURE_BITS)]
+
+
+_TABLES = {"letters": LETTER_TABLE, "numbers": NUMBER_TABLE}
+
+
+@lru_cache(maxsize=64)
+def restricted_table(kind, targets):
     """
-    Track hands and recognize static ASL numbers (0-9)
-    Used for the number practice page
+    The "letters" or "numbers" table with every answer outside `targets`
+    (a frozenset) mapped to None, for lessons that only test a few signs.
+    Built once per distinct lesson.
     """
-    try:
-        # Get base64 image from frontend
-        image_data = request.data.get("image")
-        if not image_data:
-            return Response({"error": "No image data provided"}, status=400)
-
-        if "," in image_data:
-            image_data = image_data.split(",", 1)[1]
-
-        img_bytes = base64.b64decode(image_data)
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        if frame is None:
-            return Response({"error": "Could not decode image"}, status=400)
-
-        # Process with MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = hands.process(rgb_frame)
-
-        hand_data = []
-        recognized_numbers = []
-
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                landmarks = []
-                for landmark in hand_landmarks.landmark:
-                    landmarks.append({
-                        "x": landmark.x,
-                        "y": landmark.y,
-                        "z": landmark.z,
-                    })
-                hand_data.append(landmarks)
-                
-                # --- MODIFIED: Call the new number function ---
-                number = recognize_asl_number(landmarks)
-                if number:
-                    recognized_numbers.append(number)
+    return tuple(answer if answer in targets else None for answer in _TABLES[kind])
+
+
+def target_signs(params):
+    """
+    The `target_letters` field as a frozenset, or None when absent. Accepts a
+    JSON list of strings or a comma-separated string ("A,B,C" or "ABC");
+    anything else raises ValueError with a client-facing message.
+    """
+    value = params.get("target_letters")
+    if value is None or value == "" or value == []:
+        return None
+    if isinstance(value, str):
+        value = value.split(",") if "," in value else list(value)
+    elif not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+        raise ValueError("target_letters must be a string or a list of strings")
+    return frozenset(v.strip().upper() for v in value)
+
+
+def letter_feature_masks(hands):
+    """Pack the letter features of an upright (rotation-normalized) (N, 21, 3) stack; returns (N,) ints."""
+    tips = hands[:, FINGER_TIPS]
+    mcps = hands[:, FINGER_MCPS]
+    pips = hands[:, FINGER_PIPS]
+    thumb_tip = hands[:, 4]
+
+    # Y-axis is inverted, so "up" is a smaller Y value
+    up = tips[:, :, 1] < mcps[:, :, 1]
+    # Tip is "lower" (higher Y) than the middle knuckle
+    curved = tips[:, :, 1] > pips[:, :, 1]
+    # After normalization a sideways finger has level Ys and Xs far apart
+    sideways = (np.abs(tips[:, :2, 1] - mcps[:, :2, 1]) < 0.04) & (np.abs(tips[:, :2, 0] - mcps[:, :2, 0]) > 0.05)
+
+    thumb_extended_sideways = thumb_tip[:, 0] > mcps[:, 0, 0] + 0.06
+    dx = thumb_tip[:, 0] - tips[:, 0, 0]
+    dy = thumb_tip[:, 1] - tips[:, 0, 1]
+    thumb_touches_index = dx * dx + dy * dy < recognizer_njit.THUMB_INDEX_TOUCH_SQ
+    thumb_near_tips = (np.abs(thumb_tip[:, 1:2] - tips[:, 1:3, 1]) < 0.07).any(axis=1)
+
+    bits = np.concatenate(
+        (up, curved, sideways, np.stack((thumb_extended_sideways, thumb_touches_index, thumb_near_tips), axis=1)),
+        axis=1,
+    )
+    return bits @ _LETTER_BIT_WEIGHTS
+
 
+def letter_feature_mask(hand):
+    """Pack the letter features of an upright (rotation-normalized) (21, 3) hand."""
+    return int(letter_feature_masks(hand[np.newaxis])[0])
+
+
+def number_feature_masks(hands):
+    """Pack the number features of an (N, 21, 3) stack (vertical orientation assumed); returns (N,) ints."""
+    tips = hands[:, FINGER_TIPS]
+    thumb_tip = hands[:, 4]
+
+    up = tips[:, :, 1] < hands[:, FINGER_MCPS, 1] - 0.05
+    # Thumb must be *significantly* higher than its knuckle
+    thumb_up = thumb_tip[:, 1] < hands[:, 3, 1] - 0.03
+    dx = tips[:, :, 0] - thumb_tip[:, 0:1]
+    dy = tips[:, :, 1] - thumb_tip[:, 1:2]
+    touching = dx * dx + dy * dy < recognizer_njit.NUMBER_TOUCH_SQ
+
+    bits = np.concatenate((up, thumb_up[:, np.newaxis], touching), axis=1)
+    return bits @ _NUMBER_BIT_WEIGHTS
+
+
+def number_feature_mask(hand):
+    """Pack the number features of a (21, 3) hand (vertical orientation assumed)."""
+    return int(number_feature_masks(hand[np.newaxis])[0])
+
+
+def recognize_asl_letter(landmarks):
+    """
+    Improved ASL letter recognition with rotation normalization.
+    Recognizes: A, B, C, D, E, F, G, H, I, L, V, Y
+    Takes a (21, 3) landmark array (or the legacy list of x/y/z dicts).
+    """
+    hand = as_hand_array(landmarks)
+    if hand is None:
+        logger.debug("Invalid landmarks: got %d landmarks", len(landmarks) if landmarks is not None else 0)
+        return None
+
+    if recognizer_njit.NUMBA_AVAILABLE:
+        # Compiled kernel does the rotation normalization itself
+        mask = recognizer_njit.letter_feature_mask(hand)
+    else:
+        # Normalize hand rotation so horizontal signs (G, H) can be detected
+        try:
+            hand = normalize_hand_rotation(hand)
+        except Exception as e:
+            logger.debug("Error during rotation: %s", e)  # Fallback: use the raw hand
+        mask = letter_feature_mask(hand)
+    letter = LETTER_TABLE[mask]
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Letter features {mask:013b} -> {letter or 'no letter match'}")
+    return letter
+
+
+def recognize_asl_number(landmarks):
+    """
+    Recognizes ASL numbers 0-9.
+    This logic assumes a vertical hand orientation.
+    Takes a (21, 3) landmark array (or the legacy list of x/y/z dicts).
+    """
+    hand = as_hand_array(landmarks)
+    if hand is None:
+        logger.debug("Invalid landmarks for number")
+        return None
+
+    if recognizer_njit.NUMBA_AVAILABLE:
+        mask = recognizer_njit.number_feature_mask(hand)
+    else:
+        mask = number_feature_mask(hand)
+    number = NUMBER_TABLE[mask]
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Number features {mask:09b} -> {number or 'no number match'}")
+    return number
+
+
+def recognize_asl_letters(hands, targets=None):
+    """
+    recognize_asl_letter for every hand in an (N, 21, 3) stack in one
+    vectorized pass; returns one letter (or None) per hand. With `targets`,
+    letters outside that set come back as None.
+    """
+    table = LETTER_TABLE if targets is None else restricted_table("letters", targets)
+    hands = np.asarray(hands, dtype=np.float64)
+    if recognizer_njit.NUMBA_AVAILABLE:
+        masks = [recognizer_njit.letter_feature_mask(hand) for hand in hands]
+    else:
+        masks = letter_feature_masks(normalize_hand_rotations(hands)).tolist()
+    letters = [table[mask] for mask in masks]
+    if logger.isEnabledFor(logging.DEBUG):
+        for mask, letter in zip(masks, letters):
+            logger.debug(f"Letter features {mask:013b} -> {letter or 'no letter match'}")
+    return letters
+
+
+def recognize_asl_numbers(hands, targets=None):
+    """recognize_asl_number for every hand in an (N, 21, 3) stack; one number (or None) per hand."""
+    table = NUMBER_TABLE if targets is None else restricted_table("numbers", targets)
+    hands = np.asarray(hands, dtype=np.float64)
+    if recognizer_njit.NUMBA_AVAILABLE:
+        masks = [recognizer_njit.number_feature_mask(hand) for hand in hands]
+    else:
+        masks = number_feature_masks(hands).tolist()
+    numbers = [table[mask] for mask in masks]
+    if logger.isEnabledFor(logging.DEBUG):
+        for mask, number in zip(masks, numbers):
+            logger.debug(f"Number features {mask:09b} -> {number or 'no number match'}")
+    return numbers
+
+
+@lru_cache(maxsize=1024)
+def _recognize_cached(kind, hands_bytes, num_hands, targets):
+    hands = np.frombuffer(hands_bytes, dtype=np.float32).reshape(num_hands, 21, 3)
+    recognize = recognize_asl_letters if kind == "letters" else recognize_asl_numbers
+    return tuple(answer for answer in recognize(hands, targets) if answer)
+
+
+def recognize_memoized(kind, hands, targets=None):
+    """
+    Recognized "letters" or "numbers" for a list of (21, 3) hands,
+    skipping the recognizer when the exact same landmarks were seen recently.
+    That is the common case while a user holds a sign: the static-frame
+    cache hands back the previous MediaPipe result unchanged.
+    """
+    # The key is always float32 bytes, whatever dtype the hands arrive in
+    hands_bytes = np.ascontiguousarray(np.stack(hands), dtype=np.float32).tobytes()
+    return list(_recognize_cached(kind, hands_bytes, len(hands), targets))
+
+def _track_and_recognize(request, kind):
+    """
+    Shared body of track_hands / track_asl_numbers: decode the posted frame,
+    run MediaPipe Hands on it and recognize `kind` ("letters" or "numbers")
+    for every detected hand. Answers always go under the "letters" key,
+    which is what the frontend reads for both pages.
+    """
+    try:
+        # Raw JPEG body, multipart upload, or base64 from the frontend
+        try:
+            frame = decode_frame(request)
+        except FrameDecodeError as e:
+            return Response({"error": str(e)}, status=e.status)
+
+        # Process with MediaPipe on a downscaled copy (landmarks are normalized)
+        rgb_frame = downscale_frame(frame)
+        rgb_frame.flags.writeable = False
+        params = frame_request_params(request)
+        try:
+            targets = target_signs(params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        results = track_frame(rgb_frame, params.get("session_id"))
+        if results is None:
+            # A newer frame from this session replaced this one while it waited
+            return _constant_response(request, _SKIPPED, _SKIPPED_JSON)
+        if not results.multi_hand_landmarks:
+            return _constant_response(request, _NO_HANDS, _NO_HANDS_JSON)
+
+        hands = [hand_landmarks_to_array(h) for h in results.multi_hand_landmarks]
+        hand_data = [encode_hand(landmarks, params.get("landmark_encoding")) for landmarks in hands]
+
+        # All detected hands go through the recognizer in one batched call
         return Response({
             "hands": hand_data,
-            "letters": recognized_numbers  # Frontend expects a 'letters' key
+            "letters": recognize_memoized(kind, hands, targets),
         })
 
     except Exception as e:
-        import traceback
-        print(f"Error in track_asl_numbers: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error tracking hands for %s", kind)
         return Response({"error": str(e)}, status=500)
 
+# --- NEW API ENDPOINT ---
+@never_cache
+@api_view(["POST"])
+def track_asl_numbers(request):
+    """
+    Track hands and recognize static ASL numbers (0-9)
+    Used for the number practice page
+    """
+    return _track_and_recognize(request, "numbers")
+
 # ---------- Hand Tracking APIs ----------
 
+@never_cache
 @api_view(["POST"])
 def track_hands(request):
     """
     Track hands and recognize static ASL letters (A, B, C, I, L, V, Y)
     Used for the practice page
     """
-    try:
-        # Get base64 image from frontend
-        image_data = request.data.get("image")
+    return _track_and_recognize(request, "letters")
 
-        if not image_data:
-            return Response({"error": "No image data provided"}, status=400)
 
-        # Handle "data:image/png;base64,..." prefix if present
-        if "," in image_data:
-            image_data = image_data.split(",", 1)[1]
 
-        # Decode base64 -> bytes -> numpy array -> OpenCV image
+def landmark_hands(data):
+    """
+    (N, 21, 3) float64 stack from a recognize_landmarks body: "hands" is a
+    list of hands, or "landmarks" a single hand. A hand is 21 [x, y, z]
+    triples, 63 flat numbers, or the {'x', 'y', 'z'} dicts track_hands
+    returns. Raises ValueError with a client-facing message otherwise.
+    """
+    hands = data.get("hands")
+    if hands is None and data.get("landmarks") is not None:
+        hands = [data["landmarks"]]
+    if not isinstance(hands, list) or not hands:
+        raise ValueError("hands must be a non-empty list")
+
+    arrays = []
+    for hand in hands:
         try:
-            img_bytes = base64.b64decode(image_data)
-        except Exception as e:
-            return Response({"error": f"Invalid base64 data: {e}"}, status=400)
-
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        if frame is None:
-            return Response({"error": "Could not decode image"}, status=400)
-
-        # Process with MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = hands.process(rgb_frame)
-
-        hand_data = []
-        recognized_letters = []
-
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                landmarks = []
-                for landmark in hand_landmarks.landmark:
-                    landmarks.append({
-                        "x": landmark.x,
-                        "y": landmark.y,
-                        "z": landmark.z,
-                    })
-                hand_data.append(landmarks)
-                
-                # Recognize the letter
-                letter = recognize_asl_letter(landmarks)
-                if letter:
-                    recognized_letters.append(letter)
+            if isinstance(hand, list) and hand and isinstance(hand[0], dict):
+                arr = as_hand_array(hand)
+            else:
+                arr = np.asarray(hand, dtype=np.float64).reshape(21, 3)
+        except (KeyError, TypeError, ValueError):
+            arr = None
+        if arr is None or arr.shape != (21, 3):
+            raise ValueError("each hand must be 21 [x, y, z] landmarks")
+        arrays.append(arr)
+    return np.stack(arrays)
 
-        return Response({
-            "hands": hand_data,
-            "letters": recognized_letters
-        })
 
-    except Exception as e:
-        import traceback
-        print(f"Error in track_hands: {str(e)}")
-        print(traceback.format_exc())
-        return Response({"error": str(e)}, status=500)
+@never_cache
+@api_view(["POST"])
+def recognize_landmarks(request):
+    """
+    Letter/number recognition for clients that run MediaPipe in the browser:
+    takes {"hands": [...], "mode": "letters" | "numbers"} (see landmark_hands
+    for the hand formats). No image decoding or MediaPipe on the server,
+    just the recognizer.
+    """
+    data = request.data
+    if not isinstance(data, dict):
+        return Response({"error": "Expected a JSON object"}, status=400)
+    mode = data.get("mode", "letters")
+    if mode not in ("letters", "numbers"):
+        return Response({"error": "mode must be 'letters' or 'numbers'"}, status=400)
+    try:
+        targets = target_signs(data)
+        hands = landmark_hands(data)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
 
+    recognize = recognize_asl_letters if mode == "letters" else recognize_asl_numbers
+    recognized = [answer for answer in recognize(hands, targets) if answer]
+    # Same key as track_hands / track_asl_numbers
+    return Response({"letters": recognized})
 
 
+@never_cache
 @api_view(['POST'])
 def track_video_sequence(request):
     """
@@ -569,26 +663,24 @@ def track_video_sequence(request):
     Used for the 'recognize' page (full words).
     """
 
-    # Make sure the backend model actually loaded
-    if islr_model is None:
+    # Make sure the backend model actually loaded (first call loads it)
+    if get_islr_model() is None:
         return Response(
             {"error": "ISLR model not loaded on backend"},
             status=503,
         )
 
     try:
-        session_id = request.data.get('session_id', 'default')
-        image_data = request.data.get('image')
-        reset = request.data.get('reset', False)
+        params = frame_request_params(request)
+        session_id = params.get('session_id', 'default')
+        reset = request_flag(params, 'reset')
 
         # Reset the per-session buffer if requested
         if reset:
-            sequence_buffers[session_id] = []
+            sequence_buffers.pop(session_id, None)
+            video_static_frames.discard(session_id)
             # Also reset the holistic instance for this session to avoid timestamp issues
-            from .islr_loader import holistic_instances
-            if session_id in holistic_instances:
-                holistic_instances[session_id].close()
-                del holistic_instances[session_id]
+            release_holistic_for_session(session_id)
             return Response({
                 'message': 'Buffer reset',
                 'buffer_length': 0,
@@ -596,79 +688,65 @@ def track_video_sequence(request):
                 'confidence': 0,
             })
 
-        if not image_data:
-            return Response({'error': 'No image data provided'}, status=400)
-
-        # Strip "data:image/...;base64," prefix if present
-        if ',' in image_data:
-            image_data = image_data.split(',', 1)[1]
-
-        # Decode base64 → OpenCV frame
-        try:
-            img_bytes = base64.b64decode(image_data)
-        except Exception as e:
-            return Response({'error': f'Invalid base64 data: {e}'}, status=400)
-
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        if frame is None:
-            return Response({"error": "Could not decode image"}, status=400)
-
-        # Run MediaPipe Holistic (face + pose + both hands)
-        # Use per-session instance to avoid timestamp mismatch errors
-        session_holistic = get_holistic_for_session(session_id)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = session_holistic.process(rgb_frame)
-
-        # --- Build landmarks for this frame (like main.py) ---
+        # Raw JPEG body, multipart upload, or base64 → RGB frame
         try:
-            landmarks_arr = extract_coordinates(results)  # shape (543, 3)
-        except Exception:
-            # Fallback if mediapipe failed → use zeros
-            landmarks_arr = np.zeros((468 + 21 + 33 + 21, 3), dtype=np.float32)
-
-        if session_id not in sequence_buffers:
-            sequence_buffers[session_id] = []
-
-        sequence_buffers[session_id].append(landmarks_arr)
-        buffer_len = len(sequence_buffers[session_id])
+            frame = decode_frame(request)
+        except FrameDecodeError as e:
+            return Response({'error': str(e)}, status=e.status)
+
+        # Run MediaPipe Holistic (face + pose + both hands) on a downscaled
+        # copy; its landmarks are normalized, so the ISLR input is unchanged.
+        holistic_frame = downscale_frame(frame, HOLISTIC_MAX_SIDE)
+
+        # A frame that matches the last processed one reuses its landmarks
+        thumbnail = frame_thumbnail(holistic_frame)
+        landmarks_arr = video_static_frames.lookup(session_id, thumbnail)
+        if landmarks_arr is None:
+            # Use per-session instance to avoid timestamp mismatch errors
+            results = get_holistic_for_session(session_id).process(holistic_frame)
+            if results is None:
+                # The graph was evicted/reset while this frame waited; use a fresh one
+                results = get_holistic_for_session(session_id).process(holistic_frame)
+
+            # --- Build landmarks for this frame (like main.py) ---
+            try:
+                landmarks_arr = extract_coordinates(results)  # shape (543, 3)
+            except Exception:
+                # Fallback if mediapipe failed → use zeros
+                landmarks_arr = np.zeros((468 + 21 + 33 + 21, 3), dtype=np.float32)
+            video_static_frames.store(session_id, thumbnail, landmarks_arr)
+
+        buffer = sequence_buffers.get(session_id)
 
         predicted_sign = None
         confidence = 0.0
 
-        # DEBUG LOG
-        print(
-            f"[track_video_sequence] session={session_id} "
-            f"buffer_len={buffer_len} SEQ_LEN={SEQ_LEN}"
-        )
-
-        # --- Run the model once we have SEQ_LEN frames ---
-        if buffer_len == SEQ_LEN:
-            # Use exactly the last SEQ_LEN frames
-            seq = np.array(sequence_buffers[session_id], dtype=np.float32)
-            prediction = islr_model(seq)["outputs"]
+        # Hold the session's buffer from push to clear, so an overlapping frame
+        # can't overwrite the window in flight or predict the same window twice
+        with buffer.lock:
+            buffer.push(landmarks_arr)
+            buffer_len = len(buffer)
 
-            if isinstance(prediction, tf.Tensor):
-                pred_np = prediction.numpy()
-            else:
-                pred_np = np.array(prediction)
+            logger.debug("[track_video_sequence] session=%s buffer_len=%d SEQ_LEN=%d", session_id, buffer_len, SEQ_LEN)
 
-            max_val = float(np.max(pred_np, axis=-1))
-            idx = int(np.argmax(pred_np, axis=-1))
-            confidence = max_val * 100.0
+            # --- Run the model once we have SEQ_LEN frames ---
+            if buffer_len == SEQ_LEN:
+                # Use exactly the last SEQ_LEN frames
+                pred_np = predict_islr(buffer.window())
 
-            sign_name = idx_to_sign.get(idx, "<?>")
-            print(
-                f"[track_video_sequence] session={session_id} "
-                f"raw_max={max_val:.3f} idx={idx} sign={sign_name}"
-            )
+                max_val = float(np.max(pred_np, axis=-1))
+                idx = int(np.argmax(pred_np, axis=-1))
+                confidence = max_val * 100.0
 
-            if max_val > THRESH_HOLD:
-                predicted_sign = idx_to_sign.get(idx)
-            sequence_buffers[session_id] = []
+                logger.debug(
+                    "[track_video_sequence] session=%s raw_max=%.3f idx=%d sign=%s",
+                    session_id, max_val, idx, idx_to_sign.get(idx, "<?>"),
+                )
 
-        landmarks_list = landmarks_arr.tolist()
+                if max_val > THRESH_HOLD:
+                    predicted_sign = idx_to_sign.get(idx)
+                buffer.clear()
+                buffer_len = 0
 
         # Ensure confidence is a finite float
         if not np.isfinite(confidence):
@@ -680,10 +758,15 @@ def track_video_sequence(request):
             posinf=0.0,
             neginf=0.0,
         )
-        landmarks_list = landmarks_clean.tolist()
+        if params.get('landmark_encoding') == 'q16':
+            # 6 bytes per landmark instead of ~50 characters of JSON floats
+            landmarks_out = {'landmarks_q16': base64.b64encode(quantize_landmarks(landmarks_clean)).decode('ascii')}
+        else:
+            # ORJSONRenderer writes the (543, 3) array directly, no .tolist()
+            landmarks_out = {'landmarks': landmarks_clean}
         return Response({
-            'landmarks': landmarks_list,
-            'buffer_length': len(sequence_buffers.get(session_id, [])),
+            **landmarks_out,
+            'buffer_length': buffer_len,
             'predicted_sign': predicted_sign,
             'confidence': float(round(confidence, 2)),
             'model_loaded': True,
@@ -692,8 +775,7 @@ def track_video_sequence(request):
 
     except Exception as e:
         import traceback
-        print(f"Error in track_video_sequence: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in track_video_sequence")
         return Response({
             'error': str(e),
             'traceback': traceback.format_exc()
@@ -705,6 +787,7 @@ def track_video_sequence(request):
 
 @api_view(['GET'])
 def get_available_signs(request):
+    asl_model = get_asl_model()
     return Response({
         'model_loaded': asl_model.model is not None,
         'num_signs': asl_model.num_actions,
@@ -717,6 +800,7 @@ def check_model_status(request):
     """
     Check if model is loaded properly
     """
+    asl_model = get_asl_model()
     return Response({
         'model_loaded': asl_model.model is not None,
         'model_path': asl_model.model_path,
@@ -740,56 +824,45 @@ def test_siglip_model(request):
         }, status=503)
     
     try:
-        image_data = request.data.get('image')
-        if not image_data:
-            return Response({
-                'success': False,
-                'error': 'No image data provided'
-            }, status=400)
-        
-        # Decode base64 image
-        if ',' in image_data:
-            image_data = image_data.split(',')[1]
-        
-        img_bytes = base64.b64decode(image_data)
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if frame is None:
+        # Raw JPEG body, multipart upload, or base64 image
+        try:
+            frame = decode_frame(request)
+        except FrameDecodeError as e:
             return Response({
                 'success': False,
-                'error': 'Failed to decode image'
-            }, status=400)
+                'error': str(e)
+            }, status=e.status)
         
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(rgb_frame)
+        # decode_frame already returns RGB
+        pil_image = Image.fromarray(frame)
         
         # Use improved model with smoothing and preprocessing
-        session_id = request.data.get('session_id', 'default')
-        reset_buffer = request.data.get('reset_buffer', False)
+        params = frame_request_params(request)
+        session_id = params.get('session_id', 'default')
+        reset_buffer = request_flag(params, 'reset_buffer')
         
         # Reset buffer if requested
         if reset_buffer:
-            siglip_model.reset_buffer()
+            siglip_model.reset_buffer(session_id)
         
         # Get predictions with smoothing
-        smoothed_predictions, raw_predictions = siglip_model.predict_with_smoothing(
+        smoothed_probs, raw_probs = siglip_model.predict_with_smoothing(
             pil_image,
+            session_id,
             use_hand_crop=True,  # Crop to hand region
             use_preprocessing=True  # Apply image enhancement
         )
         
         # Get top prediction
-        top_letter, top_conf = siglip_model.get_top_prediction(smoothed_predictions)
+        top_letter, top_conf = siglip_model.get_top_prediction(smoothed_probs)
         
         # Round predictions for response
-        predictions = {letter: round(conf, 4) for letter, conf in smoothed_predictions.items()}
-        raw_predictions_rounded = {letter: round(conf, 4) for letter, conf in raw_predictions.items()}
+        predictions = {letter: round(conf, 4) for letter, conf in siglip_model.to_letter_dict(smoothed_probs).items()}
+        raw_predictions_rounded = {letter: round(conf, 4) for letter, conf in siglip_model.to_letter_dict(raw_probs).items()}
         
-        # Sort by probability
-        sorted_predictions = sorted(predictions.items(), key=lambda x: x[1], reverse=True)
-        top_prediction = (top_letter or sorted_predictions[0][0], top_conf)
+        # Best letters first (argpartition over the 26 probabilities, no dict sort)
+        top_5 = siglip_model.top_k(smoothed_probs, k=5)
+        top_prediction = (top_letter or top_5[0][0], top_conf)
         
         return Response({
             'success': True,
@@ -799,15 +872,14 @@ def test_siglip_model(request):
             },
             'all_predictions': predictions,
             'raw_predictions': raw_predictions_rounded,  # Current frame without smoothing
-            'top_5': [{'letter': letter, 'confidence': conf} for letter, conf in sorted_predictions[:5]],
-            'buffer_size': len(siglip_model.prediction_buffer),
+            'top_5': [{'letter': letter, 'confidence': round(conf, 4)} for letter, conf in top_5],
+            'buffer_size': siglip_model.buffer_size(session_id),
             'hand_detected': True  # Will be False if no hand found in cropping
         })
         
     except Exception as e:
         import traceback
-        print(f"Error in test_siglip_model: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in test_siglip_model")
         return Response({
             'success': False,
             'error': str(e),
@@ -830,18 +902,19 @@ def progress_api(request):
         return Response({"detail": "Authentication required"}, status=401)
 
     if request.method == "GET":
-        # return all progress for this user
-        progress_qs = UserProgress.objects.filter(user=request.user).select_related("lesson")
-        data = [
-            {
-                "lesson_slug": p.lesson.slug,
-                "lesson_title": p.lesson.title,
-                "completed": p.completed,
-                "last_score": p.last_score,
-                "updated_at": p.updated_at.isoformat(),
-            }
-            for p in progress_qs
-        ]
+        # return all progress for this user: only the five columns the
+        # response needs, as plain dicts (no model instances). ORJSONRenderer
+        # writes updated_at in the same ISO 8601 form as .isoformat().
+        # Ordered by lesson so the list is stable between requests.
+        data = list(
+            UserProgress.objects.filter(user=request.user).values(
+                "completed",
+                "last_score",
+                "updated_at",
+                lesson_slug=F("lesson__slug"),
+                lesson_title=F("lesson__title"),
+            ).order_by("lesson__slug")
+        )
         return Response({"progress": data})
 
     # POST: update/record progress for a lesson
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Compresses the landmark JSON (repetitive keys and float text); adds Vary: Accept-Encoding
+    'django.middleware.gzip.GZipMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -127,9 +132,60 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Clients that send `Accept: application/msgpack` get MessagePack when the
+# optional msgpack package is installed; everyone else gets JSON
+try:
+    import msgpack  # noqa: F401
+    _MSGPACK_RENDERERS = ['api.renderers.MsgPackRenderer']
+except ImportError:
+    _MSGPACK_RENDERERS = []
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        *_MSGPACK_RENDERERS,
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
 
-CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
+CORS_ALLOW_CREDENTIALS = True
+
+# Raw RGB frame uploads describe their size in this header (api/frame_decoder.py)
+CORS_ALLOW_HEADERS = (*default_headers, "x-frame-shape")
+
+# A raw 1280x720 RGB frame is 2.7 MB, just over Django's 2.5 MB default
+DATA_UPLOAD_MAX_MEMORY_SIZE = 1280 * 720 * 3 + 64 * 1024
+
+# Per-frame recognizer output is logged at DEBUG; SIGNWAVE_LOG_LEVEL=DEBUG shows it.
+# Without DEBUG the api loggers default to WARNING
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api": {
+            "handlers": ["console"],
+            "level": os.environ.get("SIGNWAVE_LOG_LEVEL", "INFO" if DEBUG else "WARNING"),
+        },
+    },
+}
+
+# SIGNWAVE_WARMUP_MODELS=1 builds the MediaPipe graphs and numba kernels at
+# startup (api.apps.ApiConfig.ready), and XLA-compiles every batch size when
+# the ASL model loads, instead of on the first request. Off by
+# default: ready() also runs for migrate and every other manage.py command.
+# Set it for the server process only; with gunicorn --preload, call
+# api.apps.warm_up() from a post_fork hook so each worker warms its own pool.
+SIGNWAVE_WARMUP_MODELS = os.environ.get("SIGNWAVE_WARMUP_MODELS", "0") == "1"
\ No newline at end of file
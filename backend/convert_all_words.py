@@ -11,12 +11,15 @@ ASL_SIGNS_DIR = r"C:\Users\rimsh\Downloads\asl-signs"
 TRAIN_CSV = os.path.join(ASL_SIGNS_DIR, "train.csv")
 OUTPUT_DIR = r"c:\Users\rimsh\Desktop\SignWave\backend\reference_signs"
 
-print("Converting ALL 250 ASL word signs...")
-print("This may take 2-3 minutes...")
-print("")
+# The guard is required: conversion runs in a process pool, and on Windows
+# worker processes re-import this script.
+if __name__ == "__main__":
+    print("Converting ALL 250 ASL word signs...")
+    print("This may take 2-3 minutes...")
+    print("")
 
-batch_convert_signs(ASL_SIGNS_DIR, TRAIN_CSV, OUTPUT_DIR, limit=None)
+    batch_convert_signs(ASL_SIGNS_DIR, TRAIN_CSV, OUTPUT_DIR, limit=None)
 
-print("")
-print("[DONE] All words converted successfully!")
-print(f"Check: {OUTPUT_DIR}/words/")
+    print("")
+    print("[DONE] All words converted successfully!")
+    print(f"Check: {OUTPUT_DIR}/words/")
@@ -0,0 +1,76 @@
+"""
+Convert the ISLR Keras weights to a quantized TFLite flatbuffer.
+
+Run once from the backend directory; islr_loader picks up the .tflite
+automatically on the next server start:
+
+    python convert_islr_to_tflite.py            # float16 weights (default)
+    python convert_islr_to_tflite.py --int8     # dynamic-range int8 weights
+    python convert_islr_to_tflite.py --int8 --calibration sequences.npy
+                                                # full int8 using recorded sequences
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import tensorflow as tf
+
+sys.path.insert(0, os.path.dirname(__file__))
+from api.src.backbone import TFLiteModel, get_model
+from api.src.config import SEQ_LEN
+
+PRETRAINED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api", "pretrained")
+WEIGHTS_PATH = os.path.join(PRETRAINED_DIR, "islr-fp16-192-8-seed_all42-foldall-last.h5")
+FP16_OUTPUT_PATH = os.path.join(PRETRAINED_DIR, "islr-fp16.tflite")
+INT8_OUTPUT_PATH = os.path.join(PRETRAINED_DIR, "islr-int8.tflite")
+
+
+def build_converter(weights_path=WEIGHTS_PATH):
+    """Load the Keras weights and wrap them exactly like islr_loader does."""
+    keras_model = get_model(max_len=SEQ_LEN)
+    print(f"[*] Loading weights from {weights_path}")
+    keras_model.load_weights(weights_path, by_name=True, skip_mismatch=True)
+
+    tflite_keras_model = TFLiteModel(islr_models=[keras_model])
+    concrete_fn = tflite_keras_model.__call__.get_concrete_function()
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete_fn], tflite_keras_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    return converter
+
+
+def representative_dataset(calibration_path):
+    """Yield recorded (SEQ_LEN, 543, 3) MediaPipe sequences for int8 calibration."""
+    sequences = np.load(calibration_path).astype(np.float32)
+
+    def gen():
+        for seq in sequences:
+            yield [seq]
+
+    return gen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--int8", action="store_true", help="quantize weights to int8 instead of float16")
+    parser.add_argument("--calibration", help=".npy file of shape (N, SEQ_LEN, 543, 3) for full int8")
+    parser.add_argument("--output", help="output .tflite path")
+    args = parser.parse_args()
+
+    converter = build_converter()
+    if args.int8:
+        if args.calibration:
+            converter.representative_dataset = representative_dataset(args.calibration)
+        output_path = args.output or INT8_OUTPUT_PATH
+    else:
+        converter.target_spec.supported_types = [tf.float16]
+        output_path = args.output or FP16_OUTPUT_PATH
+
+    tflite_bytes = converter.convert()
+    with open(output_path, "wb") as f:
+        f.write(tflite_bytes)
+    print(f"[DONE] Wrote {len(tflite_bytes) / 1e6:.1f} MB to {output_path}")
+
+
+if __name__ == "__main__":
+    main()